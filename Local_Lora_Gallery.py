@@ -1,15 +1,52 @@
 import os
+import sys
 import json
+import re
+import atexit
+import functools
+import struct
 import folder_paths
 import server
+import comfy.sd
+import comfy.utils
 from aiohttp import web
 from nodes import LoraLoader, LoraLoaderModelOnly
 import urllib.parse
 import hashlib
+import zlib
+import sqlite3
+import numpy as np
 import aiohttp
 import asyncio
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
 NunchakuFluxLoraLoader = None
 NunchakuQwenLoraLoader = None
 NunchakuZImageLoraLoader = None
@@ -42,22 +79,267 @@ NODE_DIR = os.path.dirname(os.path.abspath(__file__))
 METADATA_FILE = os.path.join(NODE_DIR, "lora_gallery_metadata.json")
 UI_STATE_FILE = os.path.join(NODE_DIR, "lora_gallery_ui_state.json")
 PRESETS_FILE = os.path.join(NODE_DIR, "lora_gallery_presets.json")
+METADATA_DB_FILE = os.path.join(NODE_DIR, "lora_gallery_metadata.db")
+METADATA_BACKEND = os.environ.get("LOCAL_LORA_GALLERY_METADATA_BACKEND", "sqlite").strip().lower()
+# WAL needs shared memory between processes on one host, so by default it is only used when the
+# database is on a local filesystem; network mounts get "DELETE". Set explicitly to override.
+METADATA_SQLITE_JOURNAL_MODE = os.environ.get("LOCAL_LORA_GALLERY_SQLITE_JOURNAL_MODE", "").strip().upper()
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "lustre", "gpfs",
+    "davfs", "fuse.sshfs", "fuse.glusterfs", "fuse.cephfs", "fuse.rclone", "fuse.s3fs",
+}
+METADATA_SYNC_INTERVAL = 1.0
+HASH_CACHE_FILE = os.path.join(NODE_DIR, "lora_gallery_hash_cache.json")
+ARCHITECTURE_CACHE_FILE = os.path.join(NODE_DIR, "lora_gallery_architecture_cache.json")
+CATALOG_SNAPSHOT_FILE = os.path.join(NODE_DIR, "lora_gallery_catalog_snapshot.json")
+THUMBNAIL_CACHE_DIR = os.path.join(NODE_DIR, "thumbnail_cache")
 VIDEO_EXTENSIONS = ['.mp4', '.webm', '.mov', '.avi']
 IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp', '.gif']
+PREVIEW_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+PREVIEW_SUFFIXES = ["", ".preview"]
+
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class GalleryMetrics:
+    """In-process counters and histograms rendered in the Prometheus text format.
+
+    Recording is a dict lookup and a few additions under one lock, cheap
+    enough to leave on. Collectors registered with `add_collector` are polled
+    at scrape time for values other components already keep.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._types = {}
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, metric_type, help_text):
+        self._types[name] = metric_type
+        self._help[name] = help_text
+
+    def add_collector(self, callback):
+        """Registers `callback()` returning [(name, labels dict, value)] for gauges read at scrape time."""
+        self._collectors.append(callback)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ""
+        parts = []
+        for key, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            parts.append(f'{key}="{value}"')
+        return "{" + ",".join(parts) + "}"
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+        gauges = {}
+        for callback in self._collectors:
+            try:
+                for name, labels, value in callback():
+                    gauges[(name, tuple(sorted(labels.items())))] = value
+            except Exception as e:
+                print(f"Local Lora Gallery: Metrics collector failed: {e}")
+
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} {self._types.get(name, 'untyped')}")
+
+        for (name, labels), value in sorted({**counters, **gauges}.items()):
+            header(name)
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for (name, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+            header(name)
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f"{name}_bucket{self._format_labels(labels + (('le', repr(bound)),))} {bucket_count}")
+            lines.append(f"{name}_bucket{self._format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+gallery_metrics = GalleryMetrics(METRICS_LATENCY_BUCKETS)
+for _name, _type, _help in (
+    ("localloragallery_request_seconds", "histogram", "Latency of /localloragallery routes."),
+    ("localloragallery_requests_total", "counter", "Requests to /localloragallery routes by status."),
+    ("localloragallery_phase_seconds", "histogram", "Time spent in gallery query phases (scan, metadata_load, filter, preview_lookup)."),
+    ("localloragallery_hash_bytes_total", "counter", "Bytes read while hashing LoRA files."),
+    ("localloragallery_hash_seconds_total", "counter", "Seconds spent hashing LoRA files; bytes/seconds gives throughput."),
+    ("localloragallery_civitai_requests_total", "counter", "Civitai API responses by status."),
+    ("localloragallery_civitai_request_seconds", "histogram", "Latency of Civitai API requests."),
+    ("localloragallery_metadata_reads_total", "counter", "Metadata store namespace loads by backend."),
+    ("localloragallery_metadata_writes_total", "counter", "Metadata store commits by backend."),
+    ("localloragallery_json_file_reads_total", "counter", "JSON file reads by file name."),
+    ("localloragallery_json_file_writes_total", "counter", "JSON file writes by file name."),
+    ("localloragallery_cache_requests_total", "counter", "Cache lookups by cache and result (hit/miss)."),
+    ("localloragallery_lora_weight_cache_bytes", "gauge", "Bytes of LoRA weights held in RAM."),
+    ("localloragallery_prefetch_files_total", "counter", "Selected LoRA files warmed ahead of execution by mode (load/readahead)."),
+):
+    gallery_metrics.describe(_name, _type, _help)
+
+def timed_route(handler):
+    """Records latency and status of a /localloragallery route handler."""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            route = request.path
+            gallery_metrics.observe("localloragallery_request_seconds", time.perf_counter() - start, route=route)
+            gallery_metrics.inc("localloragallery_requests_total", route=route, status=status)
+    return wrapper
+
+# Blocking work from route handlers, capped per kind. The pool is exactly the
+# sum of the caps, so a burst of one kind can never starve the others.
+IO_CONCURRENCY_LIMITS = {"catalog": 2, "metadata": 2, "files": 4}
+io_executor = ThreadPoolExecutor(max_workers=sum(IO_CONCURRENCY_LIMITS.values()), thread_name_prefix="lora_gallery_io")
+_io_semaphores = {}
+
+async def run_blocking(kind, func, *args):
+    """Runs blocking `func(*args)` on `io_executor`, at most IO_CONCURRENCY_LIMITS[kind] at a time."""
+    semaphore = _io_semaphores.get(kind)
+    if semaphore is None:
+        semaphore = _io_semaphores[kind] = asyncio.Semaphore(IO_CONCURRENCY_LIMITS[kind])
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(io_executor, functools.partial(func, *args))
+
+HASH_READ_BUFFER_SIZE = 8 * 1024 * 1024
+HASH_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+class Crc32Hash:
+    """hashlib-style wrapper around zlib.crc32."""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value & 0xFFFFFFFF:08x}"
+
+HASH_ALGORITHMS = {"sha256": hashlib.sha256, "crc32": Crc32Hash}
+if blake3 is not None:
+    HASH_ALGORITHMS["blake3"] = blake3
+# Civitai's AutoV2 is the first 10 hex digits of the SHA256, so it costs nothing extra.
+DERIVED_HASH_ALGORITHMS = {"autov2": ("sha256", lambda digest: digest[:10])}
+SUPPORTED_HASH_ALGORITHMS = list(HASH_ALGORITHMS) + list(DERIVED_HASH_ALGORITHMS)
+LOCAL_IDENTITY_HASH = os.environ.get("LOCAL_LORA_GALLERY_IDENTITY_HASH", "blake3" if blake3 is not None else "crc32").strip().lower()
+if LOCAL_IDENTITY_HASH not in SUPPORTED_HASH_ALGORITHMS:
+    print(f"Local Lora Gallery: Unknown identity hash '{LOCAL_IDENTITY_HASH}', using crc32.")
+    LOCAL_IDENTITY_HASH = "crc32"
+# SHA256 makes Civitai sync instant afterwards; the identity hash rides along on the same read.
+HASH_ALL_DEFAULT_ALGORITHMS = ["sha256", LOCAL_IDENTITY_HASH]
+
+def calculate_file_digests(filepath, algorithms):
+    """Calculates several digests of a file in a single read pass.
+
+    `algorithms` may contain any of SUPPORTED_HASH_ALGORITHMS; returns
+    {algorithm: hex digest}, or None if the file does not exist.
+    """
+    if not os.path.exists(filepath):
+        return None
+    base_algorithms = {DERIVED_HASH_ALGORITHMS[a][0] if a in DERIVED_HASH_ALGORITHMS else a for a in algorithms}
+    hashers = {name: HASH_ALGORITHMS[name]() for name in base_algorithms}
+    buffer = bytearray(HASH_READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    total_read = 0
+    start = time.perf_counter()
+    with open(filepath, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            total_read += read
+            chunk = view[:read]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    gallery_metrics.inc("localloragallery_hash_bytes_total", total_read)
+    gallery_metrics.inc("localloragallery_hash_seconds_total", time.perf_counter() - start)
+    digests = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+    for name in algorithms:
+        if name in DERIVED_HASH_ALGORITHMS:
+            source, derive = DERIVED_HASH_ALGORITHMS[name]
+            digests[name] = derive(digests[source])
+    return digests
 
 def calculate_sha256(filepath):
     """Calculates the SHA256 hash of a file efficiently."""
-    if not os.path.exists(filepath):
+    digests = calculate_file_digests(filepath, ["sha256"])
+    return digests["sha256"] if digests else None
+
+SAFETENSORS_MAX_HEADER_SIZE = 100 * 1024 * 1024
+
+def read_safetensors_header(filepath):
+    """Reads only the JSON header of a .safetensors file (never the tensor data).
+
+    Returns None for files that are not safetensors or have a malformed header.
+    """
+    if not filepath.lower().endswith(".safetensors"):
+        return None
+    try:
+        with open(filepath, "rb") as f:
+            prefix = f.read(8)
+            if len(prefix) != 8:
+                return None
+            (header_size,) = struct.unpack("<Q", prefix)
+            if header_size <= 0 or header_size > SAFETENSORS_MAX_HEADER_SIZE:
+                return None
+            raw_header = f.read(header_size)
+        if len(raw_header) != header_size:
+            return None
+        header = json.loads(raw_header)
+        return header if isinstance(header, dict) else None
+    except (OSError, ValueError, UnicodeDecodeError):
         return None
-    hash_sha256 = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
-    return hash_sha256.hexdigest()
 
 def load_json_file(file_path, default_data={}):
     if not os.path.exists(file_path):
         return default_data
+    gallery_metrics.inc("localloragallery_json_file_reads_total", file=os.path.basename(file_path))
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -68,46 +350,1679 @@ def load_json_file(file_path, default_data={}):
         print(f"Error loading {file_path}: {e}")
         return default_data
 
-def save_json_file(data, file_path):
+def temp_path_for(file_path):
+    """Returns a sibling temp path unique to this process and thread, for write-then-rename."""
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def save_json_file(data, file_path, compact=False):
+    """Writes JSON via a temp file and rename, so a crash never leaves a truncated file."""
+    tmp_path = temp_path_for(file_path)
+    gallery_metrics.inc("localloragallery_json_file_writes_total", file=os.path.basename(file_path))
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            else:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
     except Exception as e:
         print(f"Error saving {file_path}: {e}")
+        remove_file_quietly(tmp_path)
+
+def remove_file_quietly(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+def preview_stem_key(stem):
+    """Key for matching a LoRA to its preview by file stem, case-folded where the filesystem usually is
+    (os.path.normcase covers Windows; macOS volumes are case-insensitive by default but normcase leaves them alone)."""
+    stem = os.path.normcase(stem)
+    return stem.lower() if sys.platform == "darwin" else stem
+
+def is_network_path(path):
+    """Best-effort check whether `path` lives on a network filesystem (Linux mount table, Windows drive type)."""
+    path = os.path.abspath(path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return False
+    best_point, best_type = "", ""
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) >= len(best_point):
+            best_point, best_type = mount_point, fs_type
+    return best_type.lower() in NETWORK_FILESYSTEMS
+
+@contextmanager
+def file_lock(file_path):
+    """Exclusive cross-process lock on `file_path` + ".lock", held for the duration of the block."""
+    with open(f"{file_path}.lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+UI_STATE_FLUSH_DELAY = 2.0
+UI_STATE_TTL = 30 * 24 * 3600
+UI_STATE_MAX_ENTRIES = 500
+
+class UiStateBuffer:
+    """Per-node UI state held in memory and persisted by a debounced write-behind.
+
+    Updates arriving within UI_STATE_FLUSH_DELAY of each other share one disk
+    write; reads never write. Entries not read or updated for UI_STATE_TTL are
+    dropped on flush, and the file is capped at UI_STATE_MAX_ENTRIES most recently
+    used nodes. Flushes merge with the file under a cross-process lock, keeping the
+    most recently updated state per node, so processes sharing the file do not
+    drop each other's nodes.
+    """
+
+    LAST_SEEN_KEY = "_last_seen"
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._states = None
+        self._last_read = {}
+        self._timer = None
+        self._dirty = False
+
+    def _load(self):
+        if self._states is None:
+            self._states = load_json_file(self.file_path, {})
+            now = time.time()
+            for state in self._states.values():
+                state.setdefault(self.LAST_SEEN_KEY, now)
+        return self._states
+
+    def _schedule_flush(self):
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(UI_STATE_FLUSH_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def get(self, node_key, default):
+        with self._lock:
+            state = self._load().get(node_key)
+            if state is None:
+                return default
+            # Kept apart from LAST_SEEN_KEY: a read only delays expiry, it must not outrank
+            # another process's newer update when flushes merge.
+            self._last_read[node_key] = time.time()
+            return {k: v for k, v in state.items() if k != self.LAST_SEEN_KEY}
+
+    def update(self, node_key, state):
+        with self._lock:
+            node_state = self._load().setdefault(node_key, {})
+            node_state.update(state)
+            node_state[self.LAST_SEEN_KEY] = time.time()
+            self._schedule_flush()
+
+    def _last_used(self, node_key, state):
+        return max(state.get(self.LAST_SEEN_KEY, 0), self._last_read.get(node_key, 0))
+
+    def _collect_garbage(self):
+        cutoff = time.time() - UI_STATE_TTL
+        live = [(k, v) for k, v in self._states.items() if self._last_used(k, v) >= cutoff]
+        if len(live) > UI_STATE_MAX_ENTRIES:
+            live.sort(key=lambda item: self._last_used(*item), reverse=True)
+            live = live[:UI_STATE_MAX_ENTRIES]
+        if len(live) != len(self._states):
+            self._states = dict(live)
+            self._last_read = {k: t for k, t in self._last_read.items() if k in self._states}
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        with file_lock(self.file_path):
+            on_disk = load_json_file(self.file_path, {})
+            with self._lock:
+                self._load()
+                for node_key, state in on_disk.items():
+                    current = self._states.get(node_key)
+                    if current is None or state.get(self.LAST_SEEN_KEY, 0) > current.get(self.LAST_SEEN_KEY, 0):
+                        self._states[node_key] = state
+                self._collect_garbage()
+                data = {k: dict(v) for k, v in self._states.items()}
+            save_json_file(data, self.file_path)
+
+ui_state_buffer = UiStateBuffer(UI_STATE_FILE)
+atexit.register(ui_state_buffer.flush)
+
+class JsonMetadataBackend:
+    """Legacy backend: one JSON document per namespace, rewritten atomically on commit.
+
+    Commits re-read the document under a cross-process file lock, so
+    processes sharing the files never overwrite each other's records.
+    """
+
+    def __init__(self, files):
+        self.files = files
+
+    def change_token(self):
+        """Changes whenever any process rewrites one of the files (each rewrite is a new inode)."""
+        token = []
+        for file_path in self.files.values():
+            try:
+                st = os.stat(file_path)
+                token.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                token.append(None)
+        return tuple(token)
+
+    def load(self, namespace):
+        gallery_metrics.inc("localloragallery_metadata_reads_total", backend="json", namespace=namespace)
+        return load_json_file(self.files[namespace], {})
+
+    def commit(self, namespace, upserts, deletes, merge=None):
+        """Writes the records and returns (written records, change token before, change token after).
+
+        With `merge`, each upsert is `merge(stored record, value)` instead of the value itself.
+        """
+        gallery_metrics.inc("localloragallery_metadata_writes_total", backend="json", namespace=namespace)
+        with file_lock(self.files[namespace]):
+            token_before = self.change_token()
+            data = self.load(namespace)
+            if merge:
+                upserts = {key: merge(data.get(key, {}), value) for key, value in upserts.items()}
+            data.update(upserts)
+            for key in deletes:
+                data.pop(key, None)
+            save_json_file(data, self.files[namespace])
+            return upserts, token_before, self.change_token()
+
+class SqliteMetadataBackend:
+    """SQLite backend storing one JSON row per (namespace, key), in WAL mode
+    unless the database sits on a network filesystem."""
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path, legacy_files):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._set_journal_mode()
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            self._migrate_json(legacy_files)
+
+    def _set_journal_mode(self):
+        on_network = is_network_path(os.path.dirname(os.path.abspath(self.db_path)))
+        requested = METADATA_SQLITE_JOURNAL_MODE or ("DELETE" if on_network else "WAL")
+        if requested == "WAL" and on_network:
+            print(f"Local Lora Gallery: Warning - SQLite WAL mode on a network filesystem ({self.db_path}) is unsafe across hosts; set LOCAL_LORA_GALLERY_SQLITE_JOURNAL_MODE=DELETE.")
+        mode = self._conn.execute(f"PRAGMA journal_mode={requested}").fetchone()[0].upper()
+        if mode != requested and requested == "WAL":
+            # WAL could not be enabled (e.g. no shared memory on this mount); fall back to a rollback journal.
+            print(f"Local Lora Gallery: SQLite WAL mode unavailable for {self.db_path}, using DELETE journal mode.")
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+
+    def _migrate_json(self, legacy_files):
+        """One-time import of the pre-database JSON files."""
+        with self._transaction() as conn:
+            for namespace, file_path in legacy_files.items():
+                data = load_json_file(file_path, {})
+                if data:
+                    self._write(conn, namespace, data, ())
+                    print(f"Local Lora Gallery: Migrated {len(data)} {namespace} entries from {os.path.basename(file_path)}.")
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        for file_path in legacy_files.values():
+            if os.path.exists(file_path):
+                try:
+                    os.replace(file_path, file_path + ".bak")
+                except OSError as e:
+                    print(f"Local Lora Gallery: Could not rename migrated file {file_path}: {e}")
+
+    def _transaction(self):
+        conn = self._conn
+
+        class _Tx:
+            def __enter__(self):
+                conn.execute("BEGIN IMMEDIATE")
+                return conn
+
+            def __exit__(self, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Tx()
+
+    @staticmethod
+    def _write(conn, namespace, upserts, deletes):
+        conn.executemany(
+            "INSERT INTO entries (namespace, key, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET data = excluded.data",
+            [(namespace, key, json.dumps(value, ensure_ascii=False)) for key, value in upserts.items()],
+        )
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", [(namespace, key) for key in deletes])
+
+    def change_token(self):
+        """PRAGMA data_version: changes only when another connection (process) commits."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self, namespace):
+        gallery_metrics.inc("localloragallery_metadata_reads_total", backend="sqlite", namespace=namespace)
+        rows = self._conn.execute("SELECT key, data FROM entries WHERE namespace = ? ORDER BY rowid", (namespace,))
+        return {key: json.loads(data) for key, data in rows}
+
+    def commit(self, namespace, upserts, deletes, merge=None):
+        """Writes the records and returns (written records, change token before, change token after).
+
+        With `merge`, each upsert is `merge(stored record, value)`. BEGIN
+        IMMEDIATE takes the database write lock first, so merged records are
+        read from the latest commit of any process.
+        """
+        gallery_metrics.inc("localloragallery_metadata_writes_total", backend="sqlite", namespace=namespace)
+        with self._transaction() as conn:
+            token_before = self.change_token()
+            if merge:
+                merged = {}
+                for key, value in upserts.items():
+                    row = conn.execute("SELECT data FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+                    merged[key] = merge(json.loads(row[0]) if row else {}, value)
+                upserts = merged
+            self._write(conn, namespace, upserts, deletes)
+        return upserts, token_before, self.change_token()
+
+def merge_record_fields(record, fields):
+    return {**record, **fields}
+
+class MetadataStore:
+    """Per-key metadata and preset storage with an in-process read cache.
+
+    Dicts returned by `all()`/`get()` are shared with the cache and must be
+    treated as read-only; write through `upsert`/`update`/`delete` instead.
+
+    Other processes may share the backend. The cache remembers the backend's
+    change token it was loaded at and is dropped once the token moves (checked
+    at most every METADATA_SYNC_INTERVAL on reads), and a commit only patches
+    the cache when nobody else committed in between.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._cache = {}
+        self._listeners = []
+        self._token = backend.change_token()
+        self._last_sync = time.monotonic()
+        self.generation = 0
+
+    def add_listener(self, callback):
+        """Registers `callback(namespace, keys)`, called after every commit."""
+        self._listeners.append(callback)
+
+    def sync(self):
+        """Drops the cache if another process committed since it was loaded; returns True if it did."""
+        with self._lock:
+            self._last_sync = time.monotonic()
+            token = self.backend.change_token()
+            if token == self._token:
+                return False
+            self._token = token
+            self._cache = {}
+            self.generation += 1
+            return True
+
+    def _namespace(self, namespace):
+        if time.monotonic() - self._last_sync >= METADATA_SYNC_INTERVAL:
+            self.sync()
+        data = self._cache.get(namespace)
+        if data is None:
+            data = self._cache[namespace] = self.backend.load(namespace)
+        return data
+
+    def all(self, namespace):
+        with self._lock:
+            return self._namespace(namespace)
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            return self._namespace(namespace).get(key, default)
+
+    def _apply(self, namespace, upserts, deletes=(), merge=None):
+        """Commits to the backend and returns (written records, changed keys or None when everything may have changed)."""
+        with self._lock:
+            written, token_before, token_after = self.backend.commit(namespace, upserts, deletes, merge)
+            keys = set(written) | set(deletes)
+            if token_before != self._token:
+                # Another process committed since the cache was loaded, so patching it would hide that commit.
+                self._cache = {}
+                keys = None
+            elif namespace in self._cache:
+                data = dict(self._cache[namespace])
+                data.update(written)
+                for key in deletes:
+                    data.pop(key, None)
+                self._cache[namespace] = data
+            self._token = token_after
+            self.generation += 1
+        return written, keys
+
+    def _notify(self, namespace, keys):
+        # Listeners take their own locks, so they must never run while this store's lock is held.
+        for callback in self._listeners:
+            try:
+                callback(namespace, keys)
+            except Exception as e:
+                print(f"Local Lora Gallery: Metadata listener failed: {e}")
+
+    def _commit(self, namespace, upserts, deletes=()):
+        self._notify(namespace, self._apply(namespace, upserts, deletes)[1])
+
+    def upsert(self, namespace, key, value):
+        self._commit(namespace, {key: value})
+
+    def update(self, namespace, key, fields):
+        """Merges `fields` into one record in a single commit and returns the new record."""
+        return self.update_many(namespace, {key: fields}).get(key)
+
+    def update_many(self, namespace, updates, merge=None):
+        """Merges {key: fields} into the latest stored records in a single commit.
+
+        `merge(stored record, value)` replaces the plain field merge, for
+        updates that depend on what is stored at commit time.
+        """
+        updates = {key: fields for key, fields in updates.items() if fields}
+        if not updates:
+            return {}
+        merged, keys = self._apply(namespace, updates, merge=merge or merge_record_fields)
+        self._notify(namespace, keys)
+        return merged
+
+    def delete(self, namespace, key):
+        self._commit(namespace, {}, (key,))
+
+def create_metadata_store():
+    legacy_files = {"metadata": METADATA_FILE, "presets": PRESETS_FILE}
+    if METADATA_BACKEND == "json":
+        return MetadataStore(JsonMetadataBackend(legacy_files))
+    try:
+        return MetadataStore(SqliteMetadataBackend(METADATA_DB_FILE, legacy_files))
+    except sqlite3.Error as e:
+        print(f"Local Lora Gallery: SQLite metadata store unavailable ({e}), falling back to JSON files.")
+        return MetadataStore(JsonMetadataBackend(legacy_files))
+
+metadata_store = create_metadata_store()
+load_metadata = lambda: metadata_store.all("metadata")
+load_presets = lambda: metadata_store.all("presets")
+
+CATALOG_RECHECK_INTERVAL = 2.0
+CATALOG_EXCLUDED_DIRS = {".git"}
+CATALOG_WATCH_INTERVAL = 3.0
+CATALOG_PUSH_MAX_ITEMS = 200
+CATALOG_SNAPSHOT_FORMAT = 3
+
+SEARCH_MIN_MATCH = 0.6
+SEARCH_FIELD_WEIGHTS = {"name": 1.0, "trigger_words": 0.6, "folder": 0.3}
+# Unscored field holding the full lowercased LoRA path, used to find plain substring matches.
+SEARCH_PATH_FIELD = "path"
+_SEARCH_TOKEN_RE = re.compile(r"[\W_]+")
+
+SIMILARITY_FIELD_WEIGHTS = {"tag": 1.0, "trigger": 1.0, "training_tag": 0.5, "folder": 0.5, "name": 0.3}
+SIMILAR_DEFAULT_LIMIT = 12
+SIMILAR_MAX_LIMIT = 100
+
+def search_trigrams(text):
+    """Returns the set of space-padded trigrams of every word in `text`."""
+    grams = set()
+    for token in _SEARCH_TOKEN_RE.split(text.lower()):
+        if token:
+            padded = f" {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    """Trigram postings over LoRA names, folders and trigger words for ranked fuzzy search.
+
+    Postings are kept as sets for cheap incremental updates and materialised
+    lazily as int32 arrays, so a query is a few np.bincount calls per word.
+    The full LoRA path is indexed too, so substring matches are verified only
+    against docs holding all of the query's trigrams.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        fields = (*SEARCH_FIELD_WEIGHTS, SEARCH_PATH_FIELD)
+        self._texts = {field: [""] * size for field in fields}
+        self._postings = {field: {} for field in fields}
+        self._arrays = {}
+
+    def set_field(self, doc_id, field, text):
+        postings = self._postings[field]
+        old_grams = search_trigrams(self._texts[field][doc_id])
+        new_grams = search_trigrams(text)
+        self._texts[field][doc_id] = text
+        for gram in old_grams - new_grams:
+            docs = postings[gram]
+            docs.discard(doc_id)
+            if not docs:
+                del postings[gram]
+            self._arrays.pop((field, gram), None)
+        for gram in new_grams - old_grams:
+            postings.setdefault(gram, set()).add(doc_id)
+            self._arrays.pop((field, gram), None)
+
+    def _posting_array(self, field, gram):
+        array = self._arrays.get((field, gram))
+        if array is None:
+            docs = self._postings[field][gram]
+            array = self._arrays[(field, gram)] = np.fromiter(docs, dtype=np.int32, count=len(docs))
+        return array
+
+    def search(self, query):
+        """Returns (doc ids, scores) for docs in which every query word matches
+        at least SEARCH_MIN_MATCH of its trigrams in some field."""
+        tokens = {token for token in _SEARCH_TOKEN_RE.split(query.lower()) if token}
+        if not tokens:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        matched = np.ones(self.size, dtype=bool)
+        score = np.zeros(self.size, dtype=np.float32)
+        total_grams = 0
+        for token in tokens:
+            grams = search_trigrams(token)
+            total_grams += len(grams)
+            best = np.zeros(self.size, dtype=np.int64)
+            for field, weight in SEARCH_FIELD_WEIGHTS.items():
+                postings = self._postings[field]
+                arrays = [self._posting_array(field, gram) for gram in grams if gram in postings]
+                if not arrays:
+                    continue
+                counts = np.bincount(np.concatenate(arrays), minlength=self.size)
+                np.maximum(best, counts, out=best)
+                score += weight * counts
+            matched &= best >= SEARCH_MIN_MATCH * len(grams)
+        doc_ids = np.flatnonzero(matched)
+        return doc_ids, score[doc_ids] / total_grams
+
+    def substring_search(self, query):
+        """Returns the sorted ids of docs whose path contains `query`."""
+        query = query.lower()
+        paths = self._texts[SEARCH_PATH_FIELD]
+        # Every trigram inside a word of the query is also inside a word of any path containing it.
+        grams = {chunk[i:i + 3] for chunk in _SEARCH_TOKEN_RE.split(query) for i in range(len(chunk) - 2)}
+        if not grams:
+            return np.array([doc_id for doc_id, path in enumerate(paths) if query in path], dtype=np.int32)
+        postings = self._postings[SEARCH_PATH_FIELD]
+        if any(gram not in postings for gram in grams):
+            return np.empty(0, dtype=np.int32)
+        # Candidates are verified below, so intersecting the rarest few trigrams is enough.
+        arrays = sorted((self._posting_array(SEARCH_PATH_FIELD, gram) for gram in grams), key=len)[:3]
+        candidates = np.sort(arrays[0])
+        for array in arrays[1:]:
+            candidates = np.intersect1d(candidates, array, assume_unique=True)
+        return np.array([doc_id for doc_id in candidates.tolist() if query in paths[doc_id]], dtype=np.int32)
+
+def similarity_terms(entry):
+    """Returns {term: weight} for a catalog entry from its tags, trigger words,
+    header training tags, folder and name tokens."""
+    lora_meta = entry["meta"]
+    terms = {}
+
+    def add(kind, weight_field, values):
+        weight = SIMILARITY_FIELD_WEIGHTS[weight_field]
+        for value in values:
+            value = str(value).strip().lower()
+            if value:
+                term = f"{kind}:{value}"
+                terms[term] = max(terms.get(term, 0.0), weight)
+
+    add("tag", "tag", lora_meta.get("tags", []))
+    # Header training tags share the tag vocabulary, so they match user tags on other LoRAs.
+    add("tag", "training_tag", (lora_meta.get("local_suggestions") or {}).get("tags", []))
+    add("trigger", "trigger", str(lora_meta.get("trigger_words", "")).split(","))
+    if entry["folder"] != ".":
+        add("folder", "folder", re.split(r"[\\/]", entry["folder"]))
+    name = os.path.splitext(os.path.basename(entry["name"]))[0]
+    add("name", "name", (token for token in _SEARCH_TOKEN_RE.split(name) if len(token) >= 3 and not token.isdigit()))
+    return terms
+
+class SimilarityIndex:
+    """L2-normalised TF-IDF rows over similarity_terms() for cosine "similar LoRA" lookups.
+
+    Rows live in flat row-sorted arrays (int32 term ids, float32 weights).
+    Changing a document's terms only queues its new row and adjusts the
+    document frequencies; queued rows are merged and the matrix re-weighted
+    before the next query. A query scores every document with one sparse
+    matrix-vector product.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._vocab = {}
+        self._df = []
+        self._row_ids = np.empty(0, dtype=np.int32)
+        self._term_ids = np.empty(0, dtype=np.int32)
+        self._weights = np.empty(0, dtype=np.float32)
+        self._indptr = np.zeros(size + 1, dtype=np.int64)
+        self._pending = {}
+        self._data = None
+
+    def set_doc(self, doc_id, terms):
+        old_ids = self._pending[doc_id][0] if doc_id in self._pending else self._term_ids[self._indptr[doc_id]:self._indptr[doc_id + 1]]
+        for term_id in old_ids.tolist():
+            self._df[term_id] -= 1
+        term_ids = []
+        for term in terms:
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._df)
+                self._df.append(0)
+            self._df[term_id] += 1
+            term_ids.append(term_id)
+        self._pending[doc_id] = (np.array(term_ids, dtype=np.int32), np.array(list(terms.values()), dtype=np.float32))
+        self._data = None
+
+    def _compile(self):
+        if self._pending:
+            changed = np.zeros(self.size, dtype=bool)
+            changed[list(self._pending)] = True
+            keep = ~changed[self._row_ids]
+            doc_ids = list(self._pending)
+            rows = [self._pending[doc_id] for doc_id in doc_ids]
+            lengths = np.array([len(term_ids) for term_ids, _ in rows], dtype=np.int64)
+            row_ids = np.concatenate([self._row_ids[keep], np.repeat(np.array(doc_ids, dtype=np.int32), lengths)])
+            term_ids = np.concatenate([self._term_ids[keep]] + [term_ids for term_ids, _ in rows])
+            weights = np.concatenate([self._weights[keep]] + [weights for _, weights in rows])
+            order = np.argsort(row_ids, kind="stable")
+            self._row_ids, self._term_ids, self._weights = row_ids[order], term_ids[order], weights[order]
+            self._indptr = np.concatenate(([0], np.cumsum(np.bincount(self._row_ids, minlength=self.size))))
+            self._pending = {}
+        if self._data is None:
+            df = np.asarray(self._df, dtype=np.float32)
+            idf = np.log((1.0 + self.size) / (1.0 + df)) + 1.0
+            data = self._weights * idf[self._term_ids]
+            norms = np.sqrt(np.bincount(self._row_ids, weights=data * data, minlength=self.size)).astype(np.float32)
+            norms[norms == 0] = 1.0
+            self._data = (data / norms[self._row_ids]).astype(np.float32)
+        return self._data
+
+    def similar(self, doc_id, limit):
+        """Returns (doc ids, cosine scores) of the `limit` most similar other documents, best first."""
+        data = self._compile()
+        start, end = self._indptr[doc_id], self._indptr[doc_id + 1]
+        if start == end:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        query = np.zeros(len(self._df), dtype=np.float32)
+        query[self._term_ids[start:end]] = data[start:end]
+        scores = np.bincount(self._row_ids, weights=data * query[self._term_ids], minlength=self.size)
+        scores[doc_id] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return candidates, scores[candidates]
+
+class LoraCatalog:
+    """Process-wide in-memory index of every LoRA under the "loras" roots.
+
+    Directory listings are cached per directory and only re-read when that
+    directory's mtime changes, and metadata is merged into each entry once per
+    metadata store commit, so filtering and pagination are pure in-memory work.
+    Each directory record also carries a LoRA stem -> preview filename map built
+    from the same scandir, so preview lookups never touch the filesystem.
+    Added, removed and re-described LoRAs are collected between
+    `drain_changes()` calls so they can be pushed to open galleries.
+    The directory records are persisted to `snapshot_path`, so after a restart
+    only directories whose mtime changed since the snapshot are re-read, and
+    that walk runs outside the catalog lock so the loaded records are served
+    meanwhile.
+    """
+
+    def __init__(self, snapshot_path=None):
+        self.snapshot_path = snapshot_path
+        self._lock = threading.RLock()
+        self._scan_lock = threading.Lock()
+        self._roots = []
+        self._extensions = []
+        self._dirs = {}
+        self._entries = {}
+        self._ordered = []
+        self._folders = []
+        self._metadata = {}
+        self._tag_index = {}
+        self._tag_labels = {}
+        self._search_index = None
+        self._similarity_index = None
+        self._metadata_generation = None
+        self._metadata_dirty = True
+        self._last_check = 0.0
+        self._snapshot_dirty = False
+        self._changes = {"added": set(), "removed": set(), "updated": set()}
+        self.version = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._dirs = {}
+            self._metadata_dirty = True
+            self._last_check = 0.0
+
+    def snapshot(self):
+        """Returns (entries sorted by name, sorted folder list), refreshing if stale."""
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            return self._ordered, self._folders
+
+    def get_entry(self, lora_name):
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            return self._entries.get(lora_name)
+
+    def current_version(self):
+        """Returns the catalog version after a (possibly no-op) refresh."""
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            return self.version
+
+    def get_preview(self, lora_name):
+        """Returns (lora entry, preview filename or None, preview mtime_ns or None) from the cached directory maps."""
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(lora_name)
+            if entry is None:
+                return None, None, None
+            record = self._dirs.get(os.path.dirname(entry["path"]))
+            if record is None:
+                return entry, None, None
+            stem = preview_stem_key(os.path.splitext(os.path.basename(entry["path"]))[0])
+            preview_filename, preview_mtime_ns = record["previews"].get(stem, (None, None))
+            return entry, preview_filename, preview_mtime_ns
+
+    def invalidate_dir(self, dir_path):
+        """Forces one directory to be re-read on the next access, e.g. after writing a preview into it."""
+        with self._lock:
+            record = self._dirs.get(os.path.normpath(dir_path))
+            if record is not None:
+                record["mtime_ns"] = None
+            self._last_check = 0.0
+
+    def drain_changes(self):
+        """Refreshes the catalog and returns (version, {"added", "removed", "updated"} name sets) since the last call."""
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            changes = self._changes
+            self._changes = {"added": set(), "removed": set(), "updated": set()}
+            changes["updated"] -= changes["added"] | changes["removed"]
+            return self.version, changes
+
+    def _record_change(self, kind, names):
+        # Nothing is recorded until the first full build, otherwise startup would announce every LoRA.
+        if self.version:
+            self._changes[kind].update(names)
+
+    def _reconcile(self):
+        """Re-walks the LoRA roots if the last check is stale, without holding the catalog lock.
+
+        Only one thread walks at a time. Once the catalog has been built,
+        other threads keep serving the current records instead of waiting for
+        the walk, which matters on slow network shares.
+        """
+        with self._lock:
+            built = bool(self.version)
+            if built and time.monotonic() - self._last_check < CATALOG_RECHECK_INTERVAL:
+                return
+        if not self._scan_lock.acquire(blocking=not built):
+            return
+        try:
+            with self._lock:
+                now = time.monotonic()
+                if self.version and now - self._last_check < CATALOG_RECHECK_INTERVAL:
+                    return
+                self._last_check = now
+                roots = [os.path.normpath(r) for r in folder_paths.get_folder_paths("loras")]
+                extensions = sorted({ext.lower() for ext in folder_paths.folder_names_and_paths["loras"][1]})
+                known_dirs = dict(self._dirs) if (roots, extensions) == (self._roots, self._extensions) else {}
+            with gallery_metrics.time("localloragallery_phase_seconds", phase="scan"):
+                dirs = self._walk_dirs(roots, extensions, known_dirs)
+            metadata_store.sync()
+            with self._lock:
+                files_changed, previews_changed = self._swap_dirs(roots, extensions, dirs)
+                self._refresh(files_changed, previews_changed)
+        finally:
+            self._scan_lock.release()
+
+    def _refresh(self, files_changed=False, previews_changed=False):
+        if metadata_store.generation != self._metadata_generation:
+            self._metadata_dirty = True
+
+        if files_changed:
+            self._rebuild_entries()
+        if self._metadata_dirty:
+            with gallery_metrics.time("localloragallery_phase_seconds", phase="metadata_load"):
+                self._merge_metadata()
+        if files_changed or previews_changed:
+            self._snapshot_dirty = True
+        if files_changed or previews_changed or self._metadata_dirty:
+            self._metadata_dirty = False
+            self.version += 1
+
+    def load_snapshot(self):
+        """Seeds the directory records from the snapshot file; returns True if it was used.
+
+        The snapshot is ignored if the catalog was already built or the LoRA
+        roots or extensions changed. The next refresh reconciles it with the disk.
+        """
+        if not self.snapshot_path:
+            return False
+        snapshot = load_json_file(self.snapshot_path, {})
+        roots = [os.path.normpath(r) for r in folder_paths.get_folder_paths("loras")]
+        extensions = sorted({ext.lower() for ext in folder_paths.folder_names_and_paths["loras"][1]})
+        if snapshot.get("format") != CATALOG_SNAPSHOT_FORMAT or snapshot.get("roots") != roots or snapshot.get("extensions") != extensions:
+            return False
+        dirs = {}
+        for dir_path, record in snapshot.get("dirs", {}).items():
+            record["previews"] = {stem: tuple(preview) for stem, preview in record.get("previews", {}).items()}
+            dirs[dir_path] = record
+        with self._lock:
+            if self.version:
+                return False
+            self._roots = roots
+            self._extensions = extensions
+            self._dirs = dirs
+            self._rebuild_entries()
+            self._merge_metadata()
+            self._metadata_dirty = False
+            self._last_check = 0.0
+            self.version += 1
+        return True
+
+    def save_snapshot(self):
+        """Writes the directory records to the snapshot file if they changed since the last save."""
+        with self._lock:
+            if not self.snapshot_path or not self._snapshot_dirty:
+                return
+            data = {
+                "format": CATALOG_SNAPSHOT_FORMAT,
+                "roots": list(self._roots),
+                "extensions": list(self._extensions),
+                "dirs": {dir_path: dict(record) for dir_path, record in self._dirs.items()},
+            }
+            self._snapshot_dirty = False
+        save_json_file(data, self.snapshot_path, compact=True)
+
+    @classmethod
+    def _walk_dirs(cls, roots, extensions, known_dirs):
+        """Returns {dir path: record} for every directory under `roots`, re-reading only those whose mtime changed."""
+        extensions = set(extensions)
+        dirs = {}
+        for root in roots:
+            pending = [root]
+            while pending:
+                dir_path = pending.pop()
+                if dir_path in dirs:
+                    continue
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    continue
+
+                record = known_dirs.get(dir_path)
+                if record is None or record["mtime_ns"] != mtime_ns or record["root"] != root:
+                    record = cls._scan_dir(dir_path, root, mtime_ns, extensions)
+                dirs[dir_path] = record
+                pending.extend(record["subdirs"])
+        return dirs
+
+    def _swap_dirs(self, roots, extensions, dirs):
+        """Installs freshly walked directory records; returns (files_changed, previews_changed)."""
+        old_dirs = self._dirs if (roots, extensions) == (self._roots, self._extensions) else {}
+        self._roots = roots
+        self._extensions = extensions
+        files_changed = previews_changed = False
+        for dir_path, record in dirs.items():
+            old_record = old_dirs.get(dir_path)
+            if record is old_record:
+                continue
+            if old_record is None or any(record[k] != old_record[k] for k in ("root", "files", "file_stats", "subdirs")):
+                files_changed = True
+            elif record["previews"] != old_record["previews"]:
+                previews_changed = True
+            if old_record is not None and record["previews"] != old_record["previews"]:
+                self._record_preview_changes(dir_path, old_record["previews"], record)
+        if any(dir_path not in dirs for dir_path in old_dirs):
+            files_changed = True
+        self._dirs = dirs
+        return files_changed, previews_changed
+
+    def _record_preview_changes(self, dir_path, old_previews, record):
+        stems = {s for s in old_previews.keys() | record["previews"].keys() if old_previews.get(s) != record["previews"].get(s)}
+        prefix = "" if record["folder"] == "." else record["folder"] + os.sep
+        self._record_change("updated", (prefix + f for f in record["files"] if preview_stem_key(os.path.splitext(f)[0]) in stems))
+
+    @staticmethod
+    def _scan_dir(dir_path, root, mtime_ns, extensions):
+        relative_path = os.path.relpath(dir_path, root)
+        folder = "." if relative_path == "." else relative_path
+        files, subdirs = [], []
+        file_stats = {}
+        preview_candidates = {}
+        try:
+            with os.scandir(dir_path) as it:
+                for dir_entry in it:
+                    try:
+                        if dir_entry.is_dir():
+                            if dir_entry.name not in CATALOG_EXCLUDED_DIRS:
+                                subdirs.append(dir_entry.path)
+                            continue
+                    except OSError:
+                        continue
+                    stem, ext = os.path.splitext(dir_entry.name)
+                    ext = ext.lower()
+                    if ext in extensions:
+                        files.append(dir_entry.name)
+                        try:
+                            st = dir_entry.stat()
+                            file_stats[dir_entry.name] = [st.st_size, st.st_mtime_ns]
+                        except OSError:
+                            pass
+                    elif ext in PREVIEW_EXTENSIONS:
+                        # "name.png" beats "name.preview.png"; within a convention the extension order decides.
+                        for suffix_rank, suffix in enumerate(PREVIEW_SUFFIXES):
+                            if suffix and not stem.lower().endswith(suffix):
+                                continue
+                            base = preview_stem_key(stem[:len(stem) - len(suffix)])
+                            rank = (suffix_rank, PREVIEW_EXTENSIONS.index(ext))
+                            current = preview_candidates.get(base)
+                            if current is None or rank < current[0]:
+                                preview_candidates[base] = (rank, dir_entry)
+        except OSError as e:
+            print(f"Local Lora Gallery: Could not scan '{dir_path}': {e}")
+        # The preview mtime versions its URL, so a replaced preview gets a new URL.
+        previews = {}
+        for base, (_, dir_entry) in preview_candidates.items():
+            try:
+                previews[base] = (dir_entry.name, dir_entry.stat().st_mtime_ns)
+            except OSError:
+                continue
+        return {
+            "root": root, "folder": folder, "mtime_ns": mtime_ns, "files": files, "file_stats": file_stats,
+            "subdirs": subdirs, "previews": previews,
+        }
+
+    def _rebuild_entries(self):
+        entries = {}
+        folders = set()
+        for root in self._roots:
+            for dir_path, record in self._dirs.items():
+                if record["root"] != root:
+                    continue
+                if record["files"]:
+                    folders.add(record["folder"])
+                prefix = "" if record["folder"] == "." else record["folder"] + os.sep
+                for filename in record["files"]:
+                    lora_name = prefix + filename
+                    if lora_name in entries:
+                        continue
+                    lora_path = os.path.join(dir_path, filename)
+                    file_stat = record["file_stats"].get(filename)
+                    previous = self._entries.get(lora_name)
+                    # A file replaced under the same name keeps its path, so only an unchanged size and mtime keep "arch".
+                    same_file = previous is not None and previous["path"] == lora_path and previous["stat"] == file_stat
+                    entries[lora_name] = {
+                        "name": lora_name,
+                        "path": lora_path,
+                        "root": root,
+                        "folder": record["folder"],
+                        "sort_key": lora_name.lower(),
+                        "stat": file_stat,
+                        "meta": previous["meta"] if previous else {},
+                        "arch": previous["arch"] if same_file else None,
+                    }
+        self._record_change("added", entries.keys() - self._entries.keys())
+        self._record_change("removed", self._entries.keys() - entries.keys())
+        self._entries = entries
+        self._ordered = sorted(entries.values(), key=lambda e: e["sort_key"])
+        for doc_id, entry in enumerate(self._ordered):
+            entry["doc_id"] = doc_id
+        self._search_index = None
+        self._similarity_index = None
+        self._folders = sorted(folders, key=lambda s: s.lower())
+        self._metadata_dirty = True
+
+    def _merge_metadata(self):
+        self._metadata_generation = metadata_store.generation
+        self._metadata = load_metadata()
+        self._tag_index = {}
+        self._tag_labels = {}
+        self._search_index = None
+        self._similarity_index = None
+        for entry in self._ordered:
+            lora_meta = self._metadata.get(entry["name"], {})
+            if entry["meta"] != lora_meta:
+                self._record_change("updated", (entry["name"],))
+            entry["tag_keys"] = set()
+            self._set_metadata(entry, lora_meta)
+
+    def _set_metadata(self, entry, lora_meta):
+        """Swaps an entry's metadata and keeps the inverted tag index in step."""
+        name = entry["name"]
+        for tag in entry["tag_keys"]:
+            names = self._tag_index.get(tag)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._tag_index[tag]
+                    self._tag_labels.pop(tag, None)
+        entry["meta"] = lora_meta
+        entry["tag_keys"] = {str(t).lower() for t in lora_meta.get("tags", [])}
+        # Tags match case-insensitively; facets show the spelling most recently saved.
+        for tag in lora_meta.get("tags", []):
+            self._tag_labels[str(tag).lower()] = str(tag)
+        for tag in entry["tag_keys"]:
+            self._tag_index.setdefault(tag, set()).add(name)
+        if self._search_index is not None:
+            self._search_index.set_field(entry["doc_id"], "trigger_words", lora_meta.get("trigger_words", ""))
+        if self._similarity_index is not None:
+            self._similarity_index.set_doc(entry["doc_id"], similarity_terms(entry))
+
+    def on_metadata_changed(self, namespace, keys):
+        """Metadata store listener: re-indexes only the LoRAs that were committed."""
+        if namespace != "metadata":
+            return
+        with self._lock:
+            if keys is None:
+                self._metadata_dirty = True
+            if self._metadata_generation is None or self._metadata_dirty:
+                return
+            metadata = load_metadata()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._set_metadata(entry, metadata.get(key, {}))
+                    self._record_change("updated", (key,))
+            self._metadata_generation = metadata_store.generation
+            self.version += 1
+
+    def match_tags(self, include, mode="OR", exclude=()):
+        """Resolves a tag filter to (allowed names or None for no restriction, excluded names).
+
+        AND filters intersect the posting sets smallest-first, OR filters union
+        them, and excluded tags are subtracted by the caller.
+        """
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            allowed = None
+            if include:
+                postings = [self._tag_index.get(tag, set()) for tag in include]
+                if mode == "AND":
+                    postings.sort(key=len)
+                    allowed = set(postings[0]).intersection(*postings[1:])
+                else:
+                    allowed = set().union(*postings)
+            excluded = set().union(*(self._tag_index.get(tag, set()) for tag in exclude))
+            return allowed, excluded
+
+    def tag_facets(self, entries=None):
+        """Returns [[tag, count], ...] over `entries`, or over the whole catalog
+        straight from the tag index when `entries` is None."""
+        with self._lock:
+            if entries is None:
+                counts = {tag: len(names) for tag, names in self._tag_index.items()}
+            else:
+                counts = {}
+                for entry in entries:
+                    for tag in entry["tag_keys"]:
+                        counts[tag] = counts.get(tag, 0) + 1
+            facets = [[self._tag_labels.get(tag, tag), count] for tag, count in counts.items()]
+        facets.sort(key=lambda facet: facet[0].lower())
+        return facets
+
+    def search(self, query):
+        """Ranked fuzzy search over names, folders and trigger words.
+
+        Returns (entries, doc ids best first), where the ids index `entries`.
+        Every name containing the query is included, with a bonus so it ranks
+        above typo-tolerant matches; the trigram index only adds the latter.
+        """
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            if self._search_index is None:
+                index = TrigramIndex(len(self._ordered))
+                for entry in self._ordered:
+                    doc_id = entry["doc_id"]
+                    index.set_field(doc_id, "name", os.path.splitext(os.path.basename(entry["name"]))[0])
+                    index.set_field(doc_id, "folder", "" if entry["folder"] == "." else entry["folder"])
+                    index.set_field(doc_id, "trigger_words", entry["meta"].get("trigger_words", ""))
+                    index.set_field(doc_id, SEARCH_PATH_FIELD, entry["sort_key"])
+                self._search_index = index
+            fuzzy_ids, fuzzy_scores = self._search_index.search(query)
+            substring_ids = self._search_index.substring_search(query)
+            scores = np.zeros(len(self._ordered), dtype=np.float32)
+            scores[fuzzy_ids] = fuzzy_scores
+            scores[substring_ids] += 1.0
+            matched = np.zeros(len(self._ordered), dtype=bool)
+            matched[fuzzy_ids] = True
+            matched[substring_ids] = True
+            doc_ids = np.flatnonzero(matched)
+            # Stable sort keeps equal scores in name order.
+            return self._ordered, doc_ids[np.argsort(-scores[doc_ids], kind="stable")]
+
+    def similar(self, lora_name, limit):
+        """Returns [(entry, cosine score), ...] for the LoRAs most similar to `lora_name`, or None if it is unknown."""
+        self._reconcile()
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(lora_name)
+            if entry is None:
+                return None
+            if self._similarity_index is None:
+                index = SimilarityIndex(len(self._ordered))
+                for other in self._ordered:
+                    index.set_doc(other["doc_id"], similarity_terms(other))
+                self._similarity_index = index
+            doc_ids, scores = self._similarity_index.similar(entry["doc_id"], limit)
+            return [(self._ordered[doc_id], score) for doc_id, score in zip(doc_ids.tolist(), scores.tolist())]
+
+lora_catalog = LoraCatalog(CATALOG_SNAPSHOT_FILE)
+metadata_store.add_listener(lora_catalog.on_metadata_changed)
+atexit.register(lora_catalog.save_snapshot)
+
+def warm_lora_catalog():
+    """Startup thread: seeds the catalog from its snapshot, then reconciles it with the disk."""
+    try:
+        start = time.perf_counter()
+        from_snapshot = lora_catalog.load_snapshot()
+        entries, _ = lora_catalog.snapshot()
+        lora_catalog.save_snapshot()
+        source = "snapshot" if from_snapshot else "full scan"
+        print(f"Local Lora Gallery: Catalog ready with {len(entries)} LoRAs ({source}, {time.perf_counter() - start:.2f}s).")
+    except Exception as e:
+        print(f"Local Lora Gallery: Catalog warm-up failed: {e}")
+
+threading.Thread(target=warm_lora_catalog, name="lora_gallery_catalog_warmup", daemon=True).start()
+
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="lora_gallery_hash")
+
+class HashCache:
+    """Persistent file digest cache keyed by (path, size, mtime_ns).
+
+    Hashing runs on `hash_executor` (hashlib releases the GIL for large
+    buffers), so handlers never hash on the event loop and a file is only
+    read again after it has been replaced on disk or when a digest that was
+    never computed for it is requested. Each cache entry holds one field per
+    algorithm next to the file's size and mtime.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._inflight = {}
+        self._dirty = False
 
-load_metadata = lambda: load_json_file(METADATA_FILE)
-save_metadata = lambda data: save_json_file(data, METADATA_FILE)
-load_ui_state = lambda: load_json_file(UI_STATE_FILE)
-save_ui_state = lambda data: save_json_file(data, UI_STATE_FILE)
-load_presets = lambda: load_json_file(PRESETS_FILE)
-save_presets = lambda data: save_json_file(data, PRESETS_FILE)
+    def _load(self):
+        if self._entries is None:
+            self._entries = load_json_file(self.file_path, {})
+        return self._entries
+
+    def _lookup_digests(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, {}
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            cached = self._load().get(key)
+        if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            return st, {a: cached[a] for a in SUPPORTED_HASH_ALGORITHMS if cached.get(a)}
+        return st, {}
+
+    def lookup(self, path, algorithm="sha256"):
+        """Returns the cached digest for `path` if the file is unchanged, else None."""
+        return self._lookup_digests(path)[1].get(algorithm)
+
+    def lookup_any(self, path, algorithms):
+        """Returns (algorithm, digest) for the first of `algorithms` already cached for `path`, else None."""
+        cached = self._lookup_digests(path)[1]
+        for algorithm in algorithms:
+            if algorithm in cached:
+                return algorithm, cached[algorithm]
+        return None
+
+    def get_digests(self, path, algorithms):
+        """Blocking: returns {algorithm: digest}, reading the file at most once for all missing digests."""
+        while True:
+            st, cached = self._lookup_digests(path)
+            if st is None:
+                return None
+            missing = [a for a in algorithms if a not in cached]
+            gallery_metrics.inc("localloragallery_cache_requests_total", cache="hash", result="miss" if missing else "hit")
+            if not missing:
+                return {a: cached[a] for a in algorithms}
+
+            key = os.path.normcase(os.path.abspath(path))
+            inflight_key = (key, st.st_size, st.st_mtime_ns)
+            with self._lock:
+                event = self._inflight.get(inflight_key)
+                owner = event is None
+                if owner:
+                    event = self._inflight[inflight_key] = threading.Event()
+            if not owner:
+                # Another thread is reading this file; it may not compute every digest we need, so re-check.
+                event.wait()
+                continue
+
+            try:
+                digests = calculate_file_digests(path, missing)
+                if not digests:
+                    return None
+                with self._lock:
+                    entries = self._load()
+                    entry = entries.get(key)
+                    if not entry or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+                        entry = entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+                    entry.update(digests)
+                    self._dirty = True
+                merged = {**cached, **digests}
+                return {a: merged[a] for a in algorithms}
+            finally:
+                with self._lock:
+                    del self._inflight[inflight_key]
+                event.set()
+
+    async def get_digests_async(self, path, algorithms):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor, self.get_digests, path, algorithms)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._entries)
+            self._dirty = False
+        save_json_file(data, self.file_path, compact=True)
+
+hash_cache = HashCache(HASH_CACHE_FILE)
+
+class BackgroundJob:
+    """Progress record for a long-running gallery job, polled via /localloragallery/job_status."""
+
+    def __init__(self, kind, total):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.status = "running"
+        self.message = ""
+        self.started = time.time()
+        self.finished = None
+        self.task = None
+
+    def advance(self, ok=True):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+
+    def report(self, item):
+        """Pushes per-item progress to connected clients."""
+        server.PromptServer.instance.send_sync("localloragallery.job_progress", {**self.to_dict(), "item": item})
+
+    def finish(self, status="done", message=""):
+        self.status = status
+        self.message = message
+        self.finished = time.time()
+        server.PromptServer.instance.send_sync("localloragallery.job_progress", {**self.to_dict(), "item": None})
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "message": self.message,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+background_jobs = {}
+
+def start_background_job(kind, total, coro_factory):
+    """Starts `coro_factory(job)` as a task unless a job of the same kind is already running."""
+    for job in background_jobs.values():
+        if job.kind == kind and job.status == "running":
+            return job, False
+    cutoff = time.time() - 3600
+    for job_id in [j.id for j in background_jobs.values() if j.finished and j.finished < cutoff]:
+        del background_jobs[job_id]
+
+    job = BackgroundJob(kind, total)
+    background_jobs[job.id] = job
+
+    async def runner():
+        try:
+            await coro_factory(job)
+            if job.status == "running":
+                job.finish()
+        except asyncio.CancelledError:
+            job.finish("cancelled")
+        except Exception as e:
+            import traceback
+            print(f"Local Lora Gallery: {kind} job failed: {traceback.format_exc()}")
+            job.finish("error", str(e))
+
+    job.task = asyncio.get_running_loop().create_task(runner())
+    return job, True
+
+THUMBNAIL_SIZES = (128, 256, 512)
+PREVIEW_THUMBNAIL_SIZE = 256
+THUMBNAIL_CACHE_BUDGET = int(os.environ.get("LOCAL_LORA_GALLERY_THUMBNAIL_BUDGET_MB", "512")) * 1024 * 1024
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUALITY = 80
+
+thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="lora_gallery_thumb")
+
+class ThumbnailCache:
+    """On-disk WebP preview variants keyed by source path, mtime and size.
+
+    Hits refresh the file's mtime, and when the cache grows past
+    THUMBNAIL_CACHE_BUDGET the least recently used variants are deleted.
+    """
+
+    def __init__(self, cache_dir, budget):
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._usage = None
+
+    @staticmethod
+    def snap_size(size):
+        """Rounds a requested size up to one of THUMBNAIL_SIZES so variants stay bounded."""
+        return next((s for s in THUMBNAIL_SIZES if s >= size), THUMBNAIL_SIZES[-1])
+
+    def get(self, source_path, size):
+        """Blocking: returns the path of a WebP variant of `source_path`, or None if it can't be made."""
+        if Image is None:
+            return None
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return None
+        key = f"{os.path.normcase(os.path.abspath(source_path))}|{st.st_mtime_ns}|{size}"
+        target = os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".webp")
+        hit = os.path.exists(target)
+        gallery_metrics.inc("localloragallery_cache_requests_total", cache="thumbnail", result="hit" if hit else "miss")
+        if hit:
+            try:
+                os.utime(target)
+            except OSError:
+                pass
+            return target
+
+        with self._lock:
+            event = self._inflight.get(target)
+            owner = event is None
+            if owner:
+                event = self._inflight[target] = threading.Event()
+        if not owner:
+            event.wait()
+            return target if os.path.exists(target) else None
+
+        try:
+            written = self._render(source_path, target, size)
+            if written:
+                self._account(written, target)
+                return target
+            return None
+        finally:
+            with self._lock:
+                del self._inflight[target]
+            event.set()
+
+    def _render(self, source_path, target, size):
+        try:
+            with Image.open(source_path) as img:
+                img.seek(0)
+                frame = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+            scale = size / min(frame.size)
+            if scale < 1:
+                frame = frame.resize((max(1, round(frame.width * scale)), max(1, round(frame.height * scale))), Image.LANCZOS)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = temp_path_for(target)
+            frame.save(tmp_path, "WEBP", quality=THUMBNAIL_QUALITY, method=4)
+            os.replace(tmp_path, target)
+            return os.path.getsize(target)
+        except Exception as e:
+            print(f"Local Lora Gallery: Failed to create thumbnail for '{source_path}': {e}")
+            return 0
+
+    def _account(self, added_bytes, keep_path):
+        with self._lock:
+            if self._usage is None:
+                self._usage = sum(e.stat().st_size for e in os.scandir(self.cache_dir) if e.is_file())
+            else:
+                self._usage += added_bytes
+            if self._usage <= self.budget:
+                return
+            files = sorted((e for e in os.scandir(self.cache_dir) if e.is_file()), key=lambda e: e.stat().st_mtime)
+            target_usage = int(self.budget * 0.9)
+            for dir_entry in files:
+                if self._usage <= target_usage:
+                    break
+                if dir_entry.path == keep_path:
+                    continue
+                try:
+                    file_size = dir_entry.stat().st_size
+                    os.remove(dir_entry.path)
+                    self._usage -= file_size
+                except OSError:
+                    continue
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_BUDGET)
+
+def resolve_lora_path(lora_name):
+    """Full path of a LoRA from the catalog, falling back to ComfyUI's own lookup."""
+    entry = lora_catalog.get_entry(lora_name)
+    return entry["path"] if entry else folder_paths.get_full_path("loras", lora_name)
 
 def get_lora_preview_asset_info(lora_name):
     """Finds a preview asset (image or video) for a given LoRA and returns its info."""
-    lora_path = folder_paths.get_full_path("loras", lora_name)
-    if lora_path is None:
+    _, preview_filename, preview_mtime_ns = lora_catalog.get_preview(lora_name)
+    if preview_filename is None:
         return None, "none"
-    base_name, _ = os.path.splitext(lora_path)
-
-    for ext in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
-        preview_path = base_name + ext
-        if os.path.exists(preview_path):
-            preview_filename = os.path.basename(preview_path)
-            encoded_lora_name = urllib.parse.quote_plus(lora_name)
-            encoded_filename = urllib.parse.quote_plus(preview_filename)
-            url = f"/localloragallery/preview?filename={encoded_filename}&lora_name={encoded_lora_name}"
-            
-            preview_type = "none"
-            if ext.lower() in VIDEO_EXTENSIONS:
-                preview_type = "video"
-            elif ext.lower() in IMAGE_EXTENSIONS:
-                preview_type = "image"
-            
-            return url, preview_type
 
-    return None, "none"
+    ext = os.path.splitext(preview_filename)[1]
+    encoded_lora_name = urllib.parse.quote_plus(lora_name)
+    encoded_filename = urllib.parse.quote_plus(preview_filename)
+    url = f"/localloragallery/preview?filename={encoded_filename}&lora_name={encoded_lora_name}&v={preview_mtime_ns}"
+    
+    preview_type = "none"
+    if ext.lower() in VIDEO_EXTENSIONS:
+        preview_type = "video"
+    elif ext.lower() in IMAGE_EXTENSIONS:
+        preview_type = "image"
+        url += f"&size={PREVIEW_THUMBNAIL_SIZE}"
+    
+    return url, preview_type
+
+def lora_card_info(entry):
+    """Builds the gallery card payload for a catalog entry."""
+    lora_meta = entry["meta"]
+    preview_url, preview_type = get_lora_preview_asset_info(entry["name"])
+    return {
+        "name": entry["name"],
+        "preview_url": preview_url or "",
+        "preview_type": preview_type,
+        "tags": lora_meta.get('tags', []),
+        "trigger_words": lora_meta.get('trigger_words', ''),
+        "download_url": lora_meta.get('download_url', ''),
+        "base_model": (entry["arch"] or {}).get("base_model", "unknown"),
+        "rank": (entry["arch"] or {}).get("rank"),
+    }
+
+class CatalogWatcher:
+    """Daemon thread that pushes catalog deltas to every open gallery.
+
+    The catalog is polled every CATALOG_WATCH_INTERVAL seconds (metadata
+    commits wake it immediately) and whatever changed since the last poll is
+    sent as one "localloragallery.catalog_changed" event, so clients patch
+    their cards instead of re-querying. Large deltas collapse into a reset.
+    """
+
+    def __init__(self, catalog, interval=CATALOG_WATCH_INTERVAL):
+        self.catalog = catalog
+        self.interval = interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lora_gallery_watch", daemon=True)
+                self._thread.start()
+
+    def wake(self, *_):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.publish()
+                self.catalog.save_snapshot()
+            except Exception as e:
+                print(f"Local Lora Gallery: Catalog watcher error: {e}")
+
+    def publish(self):
+        """Sends the pending catalog changes, if any; returns the payload that was sent."""
+        version, changes = self.catalog.drain_changes()
+        if not any(changes.values()):
+            return None
+        if sum(len(names) for names in changes.values()) > CATALOG_PUSH_MAX_ITEMS:
+            payload = {"version": version, "reset": True}
+        else:
+            updated = []
+            for name in sorted(changes["updated"]):
+                entry = self.catalog.get_entry(name)
+                if entry is not None:
+                    updated.append(lora_card_info(entry))
+            payload = {
+                "version": version,
+                "added": sorted(changes["added"]),
+                "removed": sorted(changes["removed"]),
+                "updated": updated,
+            }
+        server.PromptServer.instance.send_sync("localloragallery.catalog_changed", payload)
+        return payload
+
+catalog_watcher = CatalogWatcher(lora_catalog)
+metadata_store.add_listener(catalog_watcher.wake)
+
+CIVITAI_API_BASE = os.environ.get("LOCAL_LORA_GALLERY_CIVITAI_API", "https://civitai.com/api/v1").rstrip("/")
+CIVITAI_SITE_URL = "https://civitai.com"
+CIVITAI_MAX_CONNECTIONS = 8
+CIVITAI_MAX_CONCURRENCY = 4
+PREVIEW_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+CIVITAI_MAX_RETRIES = 5
+CIVITAI_MAX_BACKOFF = 60.0
+CIVITAI_RETRY_STATUSES = {429, 502, 503, 504}
+# by-hash accepts any of these; CRC32 is left out since it collides across Civitai's catalogue.
+CIVITAI_HASH_PREFERENCE = ("sha256", "blake3", "autov2")
+CIVITAI_HASH_NAMES = {"sha256": "SHA256", "blake3": "BLAKE3", "autov2": "AutoV2"}
+
+class CivitaiSyncError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+_civitai_session = None
+
+def get_civitai_session():
+    """Returns the shared, connection-pooled Civitai client session."""
+    global _civitai_session
+    if _civitai_session is None or _civitai_session.closed:
+        _civitai_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CIVITAI_MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60),
+        )
+    return _civitai_session
+
+async def civitai_get_json(session, url):
+    """GETs a Civitai API URL, backing off on 429/5xx. Returns (status, json or None)."""
+    delay = 1.0
+    for attempt in range(CIVITAI_MAX_RETRIES + 1):
+        start = time.perf_counter()
+        async with session.get(url) as response:
+            gallery_metrics.observe("localloragallery_civitai_request_seconds", time.perf_counter() - start)
+            gallery_metrics.inc("localloragallery_civitai_requests_total", status=response.status)
+            if response.status == 200:
+                return 200, await response.json(content_type=None)
+            if response.status not in CIVITAI_RETRY_STATUSES or attempt == CIVITAI_MAX_RETRIES:
+                return response.status, None
+            try:
+                wait = float(response.headers.get("Retry-After", delay))
+            except ValueError:
+                wait = delay
+        print(f"Local Lora Gallery: Civitai returned {response.status}, retrying in {wait:.1f}s...")
+        await asyncio.sleep(min(max(wait, 0.0), CIVITAI_MAX_BACKOFF))
+        delay = min(delay * 2, CIVITAI_MAX_BACKOFF)
+
+def get_civitai_preview_download(preview_media):
+    """Returns (download_url, file_ext) for a 450px-wide variant of a Civitai preview."""
+    preview_url = preview_media.get('url')
+    is_video = preview_media.get('type') == 'video'
+
+    try:
+        if is_video:
+            if '/original=true/' in preview_url:
+                temp_url = preview_url.replace('/original=true/', '/transcode=true,width=450,optimized=true/')
+                final_url = os.path.splitext(temp_url)[0] + '.webm'
+            else:
+                url_obj = urlparse(preview_url)
+                path_parts = url_obj.path.split('/')
+                filename = path_parts.pop()
+                filename_base = os.path.splitext(filename)[0]
+                new_path = f"{'/'.join(path_parts)}/transcode=true,width=450,optimized=true/{filename_base}.webm"
+                final_url = url_obj._replace(path=new_path).geturl()
+            file_ext = '.webm'
+        else:
+            if '/original=true/' in preview_url:
+               final_url = preview_url.replace('/original=true/', '/width=450/')
+            else:
+                final_url = preview_url.replace('/width=\d+/', '/width=450/') if '/width=' in preview_url else preview_url.replace(urlparse(preview_url).path, f"/width=450{urlparse(preview_url).path}")
+
+            path = urlparse(final_url).path
+            file_ext = os.path.splitext(path)[1]
+            if not file_ext or file_ext.lower() not in IMAGE_EXTENSIONS:
+                file_ext = '.jpg'
+    except Exception as e:
+        print(f"Local Lora Gallery: Failed to parse or modify URL '{preview_url}'. Error: {e}")
+        final_url = preview_url
+        file_ext = '.jpg' if not is_video else '.mp4'
+    return final_url, file_ext
+
+async def calculate_civitai_sha256(lora_name, lora_full_path):
+    """Returns the file's SHA256, hashing it now if it is not cached."""
+    print(f"Local Lora Gallery: Calculating hash for {lora_name}...")
+    # The identity hash rides along on the same read, so later local checks never re-read the file.
+    digests = await hash_cache.get_digests_async(lora_full_path, ["sha256", LOCAL_IDENTITY_HASH])
+    if not digests:
+        raise CivitaiSyncError(500, "Failed to calculate hash")
+    return digests["sha256"]
+
+async def fetch_civitai_metadata(session, lora_name, lora_full_path, lora_meta, updates):
+    """Looks a LoRA up on Civitai by hash and downloads its preview.
+
+    Changed metadata fields are written into `updates` as they become known,
+    so the caller can commit them even when a later step fails.
+    """
+    cached_hash = await run_blocking("files", hash_cache.lookup_any, lora_full_path, CIVITAI_HASH_PREFERENCE)
+    if cached_hash:
+        hash_algorithm, lookup_hash = cached_hash
+    elif lora_meta.get('hash'):
+        hash_algorithm, lookup_hash = "sha256", lora_meta['hash']
+    else:
+        hash_algorithm, lookup_hash = "sha256", await calculate_civitai_sha256(lora_name, lora_full_path)
+
+    status, civitai_version_data = await civitai_get_json(session, f"{CIVITAI_API_BASE}/model-versions/by-hash/{lookup_hash}")
+    model_hash = lookup_hash if hash_algorithm == "sha256" else None
+    if status == 200 and model_hash is None:
+        # Looked up by a faster hash; take the SHA256 from the matching file entry.
+        hash_name = CIVITAI_HASH_NAMES[hash_algorithm].lower()
+        for file_info in civitai_version_data.get('files', []):
+            hashes = {k.lower(): str(v).lower() for k, v in (file_info.get('hashes') or {}).items()}
+            if hashes.get(hash_name) == lookup_hash.lower() and hashes.get('sha256'):
+                model_hash = hashes['sha256']
+                break
+        if model_hash is None:
+            # The short hash matched a version whose files don't confirm it; only trust SHA256.
+            model_hash = await calculate_civitai_sha256(lora_name, lora_full_path)
+            status, civitai_version_data = await civitai_get_json(session, f"{CIVITAI_API_BASE}/model-versions/by-hash/{model_hash}")
+    if status != 200:
+        raise CivitaiSyncError(status, f"Civitai API (version) returned {status}. Model not found or API error.")
+
+    if model_hash and model_hash != lora_meta.get('hash'):
+        updates['hash'] = model_hash
+
+    model_id = civitai_version_data.get('modelId')
+    if not model_id:
+        raise CivitaiSyncError(500, "Could not find modelId in Civitai API response.")
+
+    images = civitai_version_data.get('images', [])
+    if not images:
+        print("Local Lora Gallery: No preview images found on Civitai, but will save other metadata.")
+    else:
+        preview_media = next((img for img in images if img.get('type') == 'image'), images[0])
+        final_url, file_ext = get_civitai_preview_download(preview_media)
+
+        lora_dir = os.path.dirname(lora_full_path)
+        lora_basename = os.path.splitext(os.path.basename(lora_full_path))[0]
+        save_path = os.path.join(lora_dir, lora_basename + file_ext)
+
+        async with session.get(final_url) as download_response:
+            if download_response.status != 200:
+                print(f"Local Lora Gallery: Warning - Failed to download preview from {final_url}. Proceeding without preview.")
+            else:
+                # Written to a temp file off the event loop and renamed, so a half-written preview is never served.
+                tmp_path = temp_path_for(save_path)
+                f = await run_blocking("files", open, tmp_path, 'wb')
+                try:
+                    async for chunk in download_response.content.iter_chunked(PREVIEW_DOWNLOAD_CHUNK_SIZE):
+                        await run_blocking("files", f.write, chunk)
+                    await run_blocking("files", f.close)
+                    await run_blocking("files", os.replace, tmp_path, save_path)
+                except BaseException:
+                    await run_blocking("files", f.close)
+                    await run_blocking("files", remove_file_quietly, tmp_path)
+                    raise
+                lora_catalog.invalidate_dir(lora_dir)
+                print(f"Local Lora Gallery: Successfully downloaded preview to '{save_path}'")
+
+    trained_words = civitai_version_data.get('trainedWords', [])
+    if trained_words:
+        updates['trigger_words'] = ", ".join(trained_words)
+
+    updates['download_url'] = f"{CIVITAI_SITE_URL}/models/{model_id}"
+    return updates
 
 @server.PromptServer.instance.routes.post("/localloragallery/sync_civitai")
+@timed_route
 async def sync_civitai_metadata(request):
     try:
         data = await request.json()
@@ -115,127 +2030,491 @@ async def sync_civitai_metadata(request):
         if not lora_name:
             return web.json_response({"status": "error", "message": "Missing lora_name"}, status=400)
 
-        lora_full_path = folder_paths.get_full_path("loras", lora_name)
+        lora_full_path = await run_blocking("files", folder_paths.get_full_path, "loras", lora_name)
         if not lora_full_path:
             return web.json_response({"status": "error", "message": "LoRA file not found"}, status=404)
 
-        metadata = load_metadata()
-        lora_meta = metadata.get(lora_name, {})
+        lora_meta = await run_blocking("metadata", metadata_store.get, "metadata", lora_name, {})
+        updates = {}
+        try:
+            await fetch_civitai_metadata(get_civitai_session(), lora_name, lora_full_path, lora_meta, updates)
+        except CivitaiSyncError as e:
+            return web.json_response({"status": "error", "message": e.message}, status=e.status)
+        finally:
+            await run_blocking("metadata", metadata_store.update, "metadata", lora_name, updates)
+            await run_blocking("metadata", hash_cache.flush)
+
+        lora_meta = {**lora_meta, **updates}
+        new_local_url, new_preview_type = await run_blocking("catalog", get_lora_preview_asset_info, lora_name)
         
-        model_hash = lora_meta.get('hash')
-        if not model_hash:
-            print(f"Local Lora Gallery: Calculating hash for {lora_name}...")
-            model_hash = calculate_sha256(lora_full_path)
-            if model_hash:
-                lora_meta['hash'] = model_hash
-                metadata[lora_name] = lora_meta
-                save_metadata(metadata)
-            else:
-                 return web.json_response({"status": "error", "message": "Failed to calculate hash"}, status=500)
+        return web.json_response({
+            "status": "ok", 
+            "metadata": { "preview_url": new_local_url, "preview_type": new_preview_type, **lora_meta }
+        })
 
-        civitai_version_url = f"https://civitai.com/api/v1/model-versions/by-hash/{model_hash}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(civitai_version_url) as response:
-                if response.status != 200:
-                    return web.json_response({"status": "error", "message": f"Civitai API (version) returned {response.status}. Model not found or API error."}, status=response.status)
-                
-                civitai_version_data = await response.json()
-                model_id = civitai_version_data.get('modelId')
-                if not model_id:
-                    return web.json_response({"status": "error", "message": "Could not find modelId in Civitai API response."}, status=500)
-
-            # civitai_model_url = f"https://civitai.com/api/v1/models/{model_id}"
-            # async with session.get(civitai_model_url) as response:
-            #     if response.status != 200:
-            #         print(f"Local Lora Gallery: Warning - Could not fetch model details for tags. Status: {response.status}")
-            #         civitai_model_data = {}
-            #     else:
-            #         civitai_model_data = await response.json()
-
-            images = civitai_version_data.get('images', [])
-            if not images:
-                print("Local Lora Gallery: No preview images found on Civitai, but will save other metadata.")
-            else:
-                preview_media = next((img for img in images if img.get('type') == 'image'), images[0])
-                preview_url = preview_media.get('url')
-                is_video = preview_media.get('type') == 'video'
+    except Exception as e:
+        import traceback
+        print(f"Error in sync_civitai_metadata: {traceback.format_exc()}")
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
 
-                try:
-                    if is_video:
-                        if '/original=true/' in preview_url:
-                            temp_url = preview_url.replace('/original=true/', '/transcode=true,width=450,optimized=true/')
-                            final_url = os.path.splitext(temp_url)[0] + '.webm'
-                        else:
-                            url_obj = urlparse(preview_url)
-                            path_parts = url_obj.path.split('/')
-                            filename = path_parts.pop()
-                            filename_base = os.path.splitext(filename)[0]
-                            new_path = f"{'/'.join(path_parts)}/transcode=true,width=450,optimized=true/{filename_base}.webm"
-                            final_url = url_obj._replace(path=new_path).geturl()
-                        file_ext = '.webm'
-                    else:
-                        if '/original=true/' in preview_url:
-                           final_url = preview_url.replace('/original=true/', '/width=450/')
-                        else:
-                            final_url = preview_url.replace('/width=\d+/', '/width=450/') if '/width=' in preview_url else preview_url.replace(urlparse(preview_url).path, f"/width=450{urlparse(preview_url).path}")
-
-                        path = urlparse(final_url).path
-                        file_ext = os.path.splitext(path)[1]
-                        if not file_ext or file_ext.lower() not in IMAGE_EXTENSIONS:
-                            file_ext = '.jpg'
-                except Exception as e:
-                    print(f"Local Lora Gallery: Failed to parse or modify URL '{preview_url}'. Error: {e}")
-                    final_url = preview_url
-                    file_ext = '.jpg' if not is_video else '.mp4'
+@server.PromptServer.instance.routes.post("/localloragallery/sync_civitai_batch")
+@timed_route
+async def sync_civitai_batch(request):
+    try:
+        data = await request.json()
+        lora_names = data.get("lora_names")
+        filter_folder = (data.get("folder") or "").strip()
+        skip_synced = bool(data.get("skip_synced", False))
+
+        entries, _ = await run_blocking("catalog", lora_catalog.snapshot)
+        if lora_names:
+            wanted = set(lora_names)
+            targets = [e for e in entries if e["name"] in wanted]
+        elif filter_folder:
+            targets = [e for e in entries if e["folder"] == filter_folder]
+        elif data.get("all"):
+            targets = list(entries)
+        else:
+            return web.json_response({"status": "error", "message": "Provide lora_names, folder or all"}, status=400)
+
+        metadata = await run_blocking("metadata", load_metadata)
+        if skip_synced:
+            targets = [e for e in targets if not metadata.get(e["name"], {}).get("download_url")]
+
+        async def run(job):
+            session = get_civitai_session()
+            semaphore = asyncio.Semaphore(CIVITAI_MAX_CONCURRENCY)
+            pending_updates = {}
+
+            async def sync_one(entry):
+                lora_name = entry["name"]
+                lora_meta = metadata.get(lora_name, {})
+                updates = pending_updates[lora_name] = {}
+                async with semaphore:
+                    try:
+                        await fetch_civitai_metadata(session, lora_name, entry["path"], lora_meta, updates)
+                        item = {"lora_name": lora_name, "status": "ok"}
+                    except CivitaiSyncError as e:
+                        item = {"lora_name": lora_name, "status": "error", "message": e.message}
+                    except Exception as e:
+                        print(f"Local Lora Gallery: Civitai sync failed for {lora_name}: {e}")
+                        item = {"lora_name": lora_name, "status": "error", "message": str(e)}
+
+                if item["status"] == "ok":
+                    preview_url, preview_type = await run_blocking("catalog", get_lora_preview_asset_info, lora_name)
+                    item["metadata"] = {"preview_url": preview_url, "preview_type": preview_type, **lora_meta, **updates}
+                job.advance(item["status"] == "ok")
+                job.report(item)
 
-                lora_dir = os.path.dirname(lora_full_path)
-                lora_basename = os.path.splitext(os.path.basename(lora_full_path))[0]
-                save_path = os.path.join(lora_dir, lora_basename + file_ext)
+            try:
+                await asyncio.gather(*(sync_one(entry) for entry in targets))
+            finally:
+                await run_blocking("metadata", metadata_store.update_many, "metadata", pending_updates)
+                await run_blocking("metadata", hash_cache.flush)
 
-                async with session.get(final_url) as download_response:
-                    if download_response.status != 200:
-                        print(f"Local Lora Gallery: Warning - Failed to download preview from {final_url}. Proceeding without preview.")
-                    else:
-                        with open(save_path, 'wb') as f:
-                            while True:
-                                chunk = await download_response.content.read(8192)
-                                if not chunk: break
-                                f.write(chunk)
-                        print(f"Local Lora Gallery: Successfully downloaded preview to '{save_path}'")
-
-            trained_words = civitai_version_data.get('trainedWords', [])
-            if trained_words:
-                lora_meta['trigger_words'] = ", ".join(trained_words)
-            
-            lora_meta['download_url'] = f"https://civitai.com/models/{model_id}"
+        job, started = start_background_job("sync_civitai", len(targets), run)
+        return web.json_response({"status": "ok", "started": started, "job": job.to_dict()})
+    except Exception as e:
+        import traceback
+        print(f"Error in sync_civitai_batch: {traceback.format_exc()}")
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
 
-            # tags = set(lora_meta.get('tags', []))
-            # if 'tags' in civitai_model_data:
-            #     for tag in civitai_model_data['tags']:
-            #         tags.add(tag)
-            # lora_meta['tags'] = sorted(list(tags))
-            
-            metadata[lora_name] = lora_meta
-            save_metadata(metadata)
-            
-            new_local_url, new_preview_type = get_lora_preview_asset_info(lora_name)
-            
-            return web.json_response({
-                "status": "ok", 
-                "metadata": { "preview_url": new_local_url, "preview_type": new_preview_type, **lora_meta }
-            })
+@server.PromptServer.instance.routes.post("/localloragallery/hash_all")
+@timed_route
+async def hash_all_loras(request):
+    try:
+        data = await request.json() if request.can_read_body else {}
+        filter_folder = (data.get("folder") or "").strip()
+        algorithms = [str(a).strip().lower() for a in (data.get("algorithms") or HASH_ALL_DEFAULT_ALGORITHMS)]
+        unsupported = [a for a in algorithms if a not in SUPPORTED_HASH_ALGORITHMS]
+        if unsupported:
+            return web.json_response({"status": "error", "message": f"Unsupported hash algorithms: {', '.join(unsupported)}"}, status=400)
+
+        entries, _ = await run_blocking("catalog", lora_catalog.snapshot)
+        paths = [e["path"] for e in entries if not filter_folder or e["folder"] == filter_folder]
+
+        async def run(job):
+            loop = asyncio.get_running_loop()
+            futures = [loop.run_in_executor(hash_executor, hash_cache.get_digests, path, algorithms) for path in paths]
+            try:
+                for future in asyncio.as_completed(futures):
+                    try:
+                        job.advance(bool(await future))
+                    except Exception as e:
+                        print(f"Local Lora Gallery: Hashing failed: {e}")
+                        job.advance(False)
+                    if job.done % 50 == 0:
+                        await run_blocking("metadata", hash_cache.flush)
+            finally:
+                for future in futures:
+                    future.cancel()
+                await run_blocking("metadata", hash_cache.flush)
+
+        job, started = start_background_job("hash_all", len(paths), run)
+        return web.json_response({"status": "ok", "started": started, "job": job.to_dict()})
+    except Exception as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+def lora_file_sizes(entries):
+    """Blocking: returns {lora name: file size} for the entries whose file still exists."""
+    sizes = {}
+    for entry in entries:
+        try:
+            sizes[entry["name"]] = os.stat(entry["path"]).st_size
+        except OSError:
+            pass
+    return sizes
+
+@server.PromptServer.instance.routes.get("/localloragallery/duplicates")
+@timed_route
+async def find_duplicate_loras(request):
+    """Groups LoRAs whose files are identical, e.g. copies or renamed duplicates.
+
+    Only files that share a size with another file are hashed, using the
+    fast local identity hash.
+    """
+    try:
+        filter_folder = request.query.get("folder", "").strip()
+        entries, _ = await run_blocking("catalog", lora_catalog.snapshot)
+        entries = [e for e in entries if not filter_folder or e["folder"] == filter_folder]
+        sizes = await run_blocking("files", lora_file_sizes, entries)
+
+        by_size = {}
+        for entry in entries:
+            if entry["name"] in sizes:
+                by_size.setdefault(sizes[entry["name"]], []).append(entry)
+        candidates = [entry for group in by_size.values() if len(group) > 1 for entry in group]
+        digests = await asyncio.gather(
+            *(hash_cache.get_digests_async(entry["path"], [LOCAL_IDENTITY_HASH]) for entry in candidates),
+            return_exceptions=True,
+        )
+        await run_blocking("metadata", hash_cache.flush)
+
+        by_digest = {}
+        for entry, digest in zip(candidates, digests):
+            if isinstance(digest, dict):
+                by_digest.setdefault((sizes[entry["name"]], digest[LOCAL_IDENTITY_HASH]), []).append(entry["name"])
+        groups = [
+            {"hash": digest, "algorithm": LOCAL_IDENTITY_HASH, "size": size, "loras": names}
+            for (size, digest), names in by_digest.items() if len(names) > 1
+        ]
+        groups.sort(key=lambda group: -group["size"])
+        return web.json_response({"status": "ok", "duplicates": groups})
     except Exception as e:
-        import traceback
-        print(f"Error in sync_civitai_metadata: {traceback.format_exc()}")
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+HEADER_WORKERS = 8
+LOCAL_INGEST_MAX_TAGS = 5
+LOCAL_INGEST_MAX_TRIGGERS = 3
+KOHYA_BASE_MODEL_TAGS = [
+    ("sdxl", "SDXL"), ("sd_v1", "SD1.5"), ("sd_v2", "SD2"), ("sd3", "SD3"), ("flux", "Flux"),
+    ("hunyuan_video", "HunyuanVideo"), ("qwen_image", "Qwen-Image"),
+]
+MODELSPEC_ARCHITECTURE_TAGS = [
+    ("stable-diffusion-xl", "SDXL"), ("stable-diffusion-v1", "SD1.5"), ("stable-diffusion-v2", "SD2"),
+    ("stable-diffusion-3", "SD3"), ("flux", "Flux"), ("hunyuan-video", "HunyuanVideo"), ("qwen-image", "Qwen-Image"),
+]
+
+header_executor = ThreadPoolExecutor(max_workers=HEADER_WORKERS, thread_name_prefix="lora_gallery_header")
+
+SD_CONTEXT_DIMS = {768: "SD1.5", 1024: "SD2", 2048: "SDXL"}
+LORA_DOWN_SUFFIXES = (".lora_down.weight", ".lora_a.weight", ".lora.down.weight", ".hada_w1_b")
+# Highest double/single block index in a full Flux model; HunyuanVideo uses the same block
+# names but has 20 double and 40 single blocks.
+FLUX_LAST_BLOCKS = (18, 37)
+# Bumped whenever detection changes, so cached results from an older detector are re-parsed.
+ARCHITECTURE_DETECTOR_VERSION = 2
+_DOUBLE_BLOCK_RE = re.compile(r"(?:double_blocks|(?<!single_)transformer_blocks)[._](\d+)[._]")
+_SINGLE_BLOCK_RE = re.compile(r"single_(?:transformer_)?blocks[._](\d+)[._]")
+
+def detect_lora_architecture(header):
+    """Infers {base_model, rank, params} from safetensors header key names, shapes and training metadata.
+
+    Returns base_model "unknown" rather than guessing when the keys fit
+    several architectures and the metadata doesn't say.
+    """
+    tensors = {k: v for k, v in (header or {}).items() if k != "__metadata__" and isinstance(v, dict)}
+    keys = [k.lower() for k in tensors]
+    training_meta = (header or {}).get("__metadata__") or {}
+    if not isinstance(training_meta, dict):
+        training_meta = {}
+
+    params = 0
+    rank_counts = {}
+    context_dim = None
+    lokr_dims = {}
+    for key, info in tensors.items():
+        shape = info.get("shape") or []
+        count = 1
+        for dim in shape:
+            count *= dim
+        params += count
+        lowered = key.lower()
+        cross_attn_key = "attn2" in lowered and "to_k" in lowered
+        if lowered.endswith(LORA_DOWN_SUFFIXES) and shape:
+            rank_counts[shape[0]] = rank_counts.get(shape[0], 0) + 1
+            if context_dim is None and cross_attn_key and len(shape) >= 2:
+                context_dim = shape[1]
+        elif cross_attn_key and len(shape) >= 2:
+            # LoKr factors the weight as kron(w1, w2), so the input dim is the product of both factors' input dims.
+            module, _, name = lowered.rpartition(".")
+            if name in ("lokr_w1", "lokr_w1_b"):
+                lokr_dims.setdefault(module, {})["w1"] = shape[1]
+            elif name in ("lokr_w2", "lokr_w2_b"):
+                lokr_dims.setdefault(module, {})["w2"] = shape[1]
+    if context_dim is None:
+        context_dim = next((dims["w1"] * dims["w2"] for dims in lokr_dims.values() if len(dims) == 2), None)
+
+    def any_key(*fragments):
+        return any(fragment in key for key in keys for fragment in fragments)
+
+    def last_block(pattern):
+        indices = [int(match.group(1)) for key in keys for match in [pattern.search(key)] if match]
+        return max(indices) if indices else None
+
+    def from_metadata():
+        base_model_version = str(training_meta.get("ss_base_model_version") or "").lower()
+        for prefix, label in KOHYA_BASE_MODEL_TAGS:
+            if base_model_version.startswith(prefix):
+                return label
+        architecture = str(training_meta.get("modelspec.architecture") or "").lower()
+        for prefix, label in MODELSPEC_ARCHITECTURE_TAGS:
+            if architecture.startswith(prefix):
+                return label
+        return None
+
+    base_model = None
+    if any_key("double_blocks", "single_blocks", "single_transformer_blocks"):
+        # Flux and HunyuanVideo share these names; only the block counts and the token refiner tell them apart.
+        last_blocks = (last_block(_DOUBLE_BLOCK_RE), last_block(_SINGLE_BLOCK_RE))
+        if any_key("token_refiner") or any(last is not None and last > limit for last, limit in zip(last_blocks, FLUX_LAST_BLOCKS)):
+            base_model = "HunyuanVideo"
+        elif last_blocks == FLUX_LAST_BLOCKS:
+            base_model = "Flux"
+    elif any_key("img_mlp", "txt_mlp", "img_mod", "txt_mod"):
+        base_model = "Qwen-Image"
+    elif any_key("context_refiner", "noise_refiner") or (any_key("layers.") and any_key("feed_forward")):
+        base_model = "Z-Image"
+    elif any_key("joint_blocks"):
+        base_model = "SD3"
+    elif context_dim in SD_CONTEXT_DIMS:
+        base_model = SD_CONTEXT_DIMS[context_dim]
+
+    if base_model is None:
+        base_model = from_metadata()
+    if base_model is None:
+        # SGM naming (kohya SDXL) vs diffusers naming (kohya SD1.x).
+        if any_key("input_blocks", "output_blocks", "middle_block", "lora_te1_", "lora_te2_", "text_encoder_2"):
+            base_model = "SDXL"
+        elif any_key("down_blocks", "up_blocks", "mid_block"):
+            base_model = "SD1.5"
+        else:
+            base_model = "unknown"
+
+    rank = max(rank_counts, key=rank_counts.get) if rank_counts else None
+    return {"base_model": base_model, "rank": rank, "params": params}
+
+class LoraArchitectureCache:
+    """Persistent architecture info keyed by (path, size, mtime_ns), filled from header parses only."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def get(self, path):
+        """Blocking: returns the architecture info for `path`, parsing its header if needed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            if self._entries is None:
+                self._entries = load_json_file(self.file_path, {})
+            cached = self._entries.get(key)
+        if (cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns
+                and cached.get("detector") == ARCHITECTURE_DETECTOR_VERSION):
+            return cached.get("arch")
+
+        arch = detect_lora_architecture(read_safetensors_header(path))
+        with self._lock:
+            self._entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "detector": ARCHITECTURE_DETECTOR_VERSION, "arch": arch}
+            self._dirty = True
+        return arch
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._entries)
+            self._dirty = False
+        save_json_file(data, self.file_path, compact=True)
+
+architecture_cache = LoraArchitectureCache(ARCHITECTURE_CACHE_FILE)
+
+async def ensure_lora_architectures(entries):
+    """Fills in catalog entries' "arch" from the cache, parsing headers off the event loop."""
+    missing = [entry for entry in entries if entry.get("arch") is None]
+    if not missing:
+        return
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(header_executor, architecture_cache.get, entry["path"]) for entry in missing),
+        return_exceptions=True,
+    )
+    for entry, arch in zip(missing, results):
+        if isinstance(arch, dict):
+            entry["arch"] = arch
+    await run_blocking("metadata", architecture_cache.flush)
+
+def suggest_local_metadata(header):
+    """Derives (trigger words, tags) from kohya training metadata in a safetensors header."""
+    training_meta = (header or {}).get("__metadata__") or {}
+    if not isinstance(training_meta, dict):
+        return [], []
+
+    tag_counts = {}
+    dataset_names = []
+    try:
+        tag_frequency = json.loads(training_meta.get("ss_tag_frequency") or "{}")
+    except ValueError:
+        tag_frequency = {}
+    if isinstance(tag_frequency, dict):
+        for dataset_dir, frequencies in tag_frequency.items():
+            # kohya dataset folders are named "<repeats>_<concept>", and the concept is usually the trigger.
+            match = re.match(r"^\d+_(.+)$", str(dataset_dir).strip())
+            if match and match.group(1).strip():
+                dataset_names.append(match.group(1).strip())
+            if isinstance(frequencies, dict):
+                for tag, count in frequencies.items():
+                    tag = str(tag).strip()
+                    if tag and isinstance(count, (int, float)):
+                        tag_counts[tag] = tag_counts.get(tag, 0) + count
+
+    ranked_tags = sorted(tag_counts, key=lambda t: (-tag_counts[t], t))
+    trigger_words = list(dict.fromkeys(dataset_names))[:LOCAL_INGEST_MAX_TRIGGERS]
+    if not trigger_words and ranked_tags:
+        try:
+            image_count = int(training_meta.get("ss_num_train_images") or 0)
+        except ValueError:
+            image_count = 0
+        # Without a named dataset, a tag present in (nearly) every caption is the best trigger guess.
+        threshold = 0.9 * image_count if image_count else tag_counts[ranked_tags[0]]
+        trigger_words = [t for t in ranked_tags if tag_counts[t] >= threshold][:LOCAL_INGEST_MAX_TRIGGERS]
+
+    trigger_keys = {t.lower() for t in trigger_words}
+    tags = [t for t in ranked_tags if t.lower() not in trigger_keys][:LOCAL_INGEST_MAX_TAGS]
+    base_model_version = str(training_meta.get("ss_base_model_version") or "").lower()
+    for prefix, label in KOHYA_BASE_MODEL_TAGS:
+        if base_model_version.startswith(prefix):
+            tags.insert(0, label)
+            break
+    return trigger_words, tags
+
+def merge_local_suggestions(lora_meta, trigger_words, tags, signature):
+    """Returns the metadata fields to update so that user edits are never overwritten.
+
+    Trigger words are only filled in when empty, and suggested tags are only
+    added once: anything a previous ingest suggested and the user removed
+    stays removed.
+    """
+    previous = lora_meta.get("local_suggestions") or {}
+    fields = {"local_suggestions": {"source": signature, "trigger_words": trigger_words, "tags": tags}}
+
+    suggested_triggers = ", ".join(trigger_words)
+    if suggested_triggers and not str(lora_meta.get("trigger_words", "")).strip() \
+            and suggested_triggers != ", ".join(previous.get("trigger_words", [])):
+        fields["trigger_words"] = suggested_triggers
+
+    existing_tags = list(lora_meta.get("tags", []))
+    known = {str(t).lower() for t in existing_tags} | {str(t).lower() for t in previous.get("tags", [])}
+    new_tags = [t for t in tags if t.lower() not in known]
+    if new_tags:
+        fields["tags"] = existing_tags + new_tags
+    return fields
+
+def apply_local_suggestions(lora_meta, suggestions):
+    """Metadata store merge: applies (trigger words, tags, signature) to the record stored at commit time."""
+    return {**lora_meta, **merge_local_suggestions(lora_meta, *suggestions)}
+
+def ingest_local_metadata(lora_path, lora_meta):
+    """Blocking: reads one LoRA's header and returns (trigger words, tags, signature), or None if unchanged."""
+    try:
+        st = os.stat(lora_path)
+    except OSError:
+        return None
+    signature = [st.st_size, st.st_mtime_ns]
+    if (lora_meta.get("local_suggestions") or {}).get("source") == signature:
+        return None
+    trigger_words, tags = suggest_local_metadata(read_safetensors_header(lora_path))
+    return trigger_words, tags, signature
+
+@server.PromptServer.instance.routes.post("/localloragallery/ingest_local")
+@timed_route
+async def ingest_local_loras(request):
+    try:
+        data = await request.json() if request.can_read_body else {}
+        lora_names = data.get("lora_names")
+        filter_folder = (data.get("folder") or "").strip()
+
+        entries, _ = await run_blocking("catalog", lora_catalog.snapshot)
+        if lora_names:
+            wanted = set(lora_names)
+            targets = [e for e in entries if e["name"] in wanted]
+        else:
+            targets = [e for e in entries if not filter_folder or e["folder"] == filter_folder]
+
+        metadata = await run_blocking("metadata", load_metadata)
+
+        async def run(job):
+            loop = asyncio.get_running_loop()
+            pending_updates = {}
+
+            async def ingest_one(entry):
+                lora_name = entry["name"]
+                try:
+                    suggestions = await loop.run_in_executor(header_executor, ingest_local_metadata, entry["path"], metadata.get(lora_name, {}))
+                except Exception as e:
+                    print(f"Local Lora Gallery: Header ingest failed for {lora_name}: {e}")
+                    job.advance(False)
+                    return
+                if suggestions:
+                    pending_updates[lora_name] = suggestions
+                job.advance(True)
+
+            try:
+                await asyncio.gather(*(ingest_one(entry) for entry in targets))
+            finally:
+                # Suggestions are merged into the records as stored at commit time, so edits made during the job survive.
+                await run_blocking("metadata", metadata_store.update_many, "metadata", pending_updates, apply_local_suggestions)
+            job.finish("done", f"Updated {len(pending_updates)} LoRAs")
+
+        job, started = start_background_job("ingest_local", len(targets), run)
+        return web.json_response({"status": "ok", "started": started, "job": job.to_dict()})
+    except Exception as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/localloragallery/job_status")
+@timed_route
+async def get_job_status(request):
+    job_id = request.query.get('job_id')
+    if job_id:
+        job = background_jobs.get(job_id)
+        if job is None:
+            return web.json_response({"status": "error", "message": "Unknown job_id"}, status=404)
+        return web.json_response(job.to_dict())
+    return web.json_response({"jobs": [job.to_dict() for job in background_jobs.values()]})
+
 @server.PromptServer.instance.routes.get("/localloragallery/get_presets")
+@timed_route
 async def get_presets(request):
-    presets = load_presets()
+    presets = await run_blocking("metadata", load_presets)
     return web.json_response(presets)
 
 @server.PromptServer.instance.routes.post("/localloragallery/save_preset")
+@timed_route
 async def save_preset(request):
     try:
         data = await request.json()
@@ -244,14 +2523,14 @@ async def save_preset(request):
         if not preset_name or not preset_data:
             return web.json_response({"status": "error", "message": "Missing preset name or data"}, status=400)
         
-        presets = load_presets()
-        presets[preset_name] = preset_data
-        save_presets(presets)
+        await run_blocking("metadata", metadata_store.upsert, "presets", preset_name, preset_data)
+        presets = await run_blocking("metadata", load_presets)
         return web.json_response({"status": "ok", "presets": presets})
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
 @server.PromptServer.instance.routes.post("/localloragallery/delete_preset")
+@timed_route
 async def delete_preset(request):
     try:
         data = await request.json()
@@ -259,135 +2538,209 @@ async def delete_preset(request):
         if not preset_name:
             return web.json_response({"status": "error", "message": "Missing preset name"}, status=400)
         
-        presets = load_presets()
-        if preset_name in presets:
-            del presets[preset_name]
-            save_presets(presets)
+        if preset_name in await run_blocking("metadata", load_presets):
+            await run_blocking("metadata", metadata_store.delete, "presets", preset_name)
+        presets = await run_blocking("metadata", load_presets)
         return web.json_response({"status": "ok", "presets": presets})
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+QUERY_CACHE_SIZE = 32
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+def parse_lora_query(query):
+    """Normalises the filter parameters shared by get_loras and get_all_tags."""
+    filter_tags_str = query.get('filter_tag', '').strip().lower()
+    filter_tags = [tag.strip() for tag in filter_tags_str.split(',') if tag.strip()]
+    exclude_tags_str = query.get('exclude_tag', '').strip().lower()
+    exclude_tags = [tag.strip() for tag in exclude_tags_str.split(',') if tag.strip()]
+    exclude_tags += [tag[1:].strip() for tag in filter_tags if tag[0] in "-!" and tag[1:].strip()]
+    filter_tags = [tag for tag in filter_tags if tag[0] not in "-!"]
+    return (
+        tuple(filter_tags),
+        query.get('mode', 'OR').upper(),
+        tuple(exclude_tags),
+        query.get('folder', '').strip(),
+        query.get('name_filter', '').strip().lower(),
+        tuple(query.getall('selected_loras', [])),
+        tuple(m.strip().lower() for m in query.get('base_model', '').split(',') if m.strip()),
+    )
+
+async def prepare_lora_query(query):
+    """Parses a query and, when it filters by base model, loads architecture info for the whole catalog."""
+    lora_query = parse_lora_query(query)
+    base_models = lora_query[-1]
+    if base_models:
+        await ensure_lora_architectures((await run_blocking("catalog", lora_catalog.snapshot))[0])
+    return lora_query
+
+def _filter_lora_query(lora_query, entries, all_folders):
+    filter_tags, filter_mode, exclude_tags, filter_folder, name_filter, selected_loras, base_models = lora_query
+    allowed_names, excluded_names = lora_catalog.match_tags(filter_tags, filter_mode, exclude_tags)
+    candidates = entries
+    if len(name_filter) >= 3:
+        # Search hits come back best first, so no separate ranking pass is needed.
+        search_entries, ranked_ids = lora_catalog.search(name_filter)
+        candidates = (search_entries[doc_id] for doc_id in ranked_ids.tolist())
+
+    filtered_loras = []
+    facet_entries = []
+    for entry in candidates:
+        if entry["name"] in excluded_names:
+            continue
+
+        if name_filter and len(name_filter) < 3 and name_filter not in entry["sort_key"]:
+            continue
+
+        if filter_folder and filter_folder != entry["folder"]:
+            continue
+
+        # LoRAs whose architecture could not be detected are kept rather than hidden.
+        if base_models:
+            base_model = (entry["arch"] or {}).get("base_model", "unknown").lower()
+            if base_model != "unknown" and base_model not in base_models:
+                continue
+
+        facet_entries.append(entry)
+        if allowed_names is not None and entry["name"] not in allowed_names:
+            continue
+        
+        filtered_loras.append(entry)
+
+    # OR-mode facets ignore the selected tags themselves so alternatives stay
+    # pickable; AND mode drills down into the current result set.
+    if filter_mode == 'AND':
+        facet_entries = filtered_loras
+    facets = lora_catalog.tag_facets(None if len(facet_entries) == len(entries) else facet_entries)
+
+    pinned_set = set(selected_loras)
+    pinned_by_name = {entry["name"]: entry for entry in filtered_loras if entry["name"] in pinned_set}
+    pinned_items = []
+    for lora in selected_loras:
+        entry = pinned_by_name.pop(lora, None)
+        if entry is not None:
+            pinned_items.append(entry)
+    remaining_items = [entry for entry in filtered_loras if entry["name"] not in pinned_set]
+    return pinned_items + remaining_items, facets, all_folders
+
+def run_lora_query(lora_query):
+    """Filters, ranks and pins the catalog for a parsed query.
+
+    Returns (ordered entries, tag facets, folders). Results are cached per
+    catalog version, so paging through one query filters only once.
+    """
+    entries, all_folders = lora_catalog.snapshot()
+    cache_key = (lora_catalog.version, lora_query)
+    with _query_cache_lock:
+        cached = _query_cache.get(cache_key)
+        if cached is not None:
+            _query_cache.move_to_end(cache_key)
+    gallery_metrics.inc("localloragallery_cache_requests_total", cache="query", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+
+    with gallery_metrics.time("localloragallery_phase_seconds", phase="filter"):
+        result = _filter_lora_query(lora_query, entries, all_folders)
+
+    with _query_cache_lock:
+        _query_cache[cache_key] = result
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return result
+
+LISTING_COMPRESSION_MIN_BYTES = 1024
+# Restarts reset the catalog version, so ETags also carry a per-process token.
+_ETAG_INSTANCE = os.urandom(4).hex()
+
+def catalog_etag(request):
+    """Weak ETag for a listing response: the catalog version plus the exact query."""
+    query = urllib.parse.urlencode(sorted(request.query.items()))
+    digest = hashlib.sha1(f"{_ETAG_INSTANCE}:{lora_catalog.current_version()}:{query}".encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match", "")
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+
+def listing_json_response(request, data, etag):
+    """JSON response revalidated through `etag` and gzip/deflate-compressed when large."""
+    response = web.json_response(data, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+    accept_encoding = request.headers.get("Accept-Encoding", "").lower()
+    if len(response.body) >= LISTING_COMPRESSION_MIN_BYTES and ("gzip" in accept_encoding or "deflate" in accept_encoding):
+        response.enable_compression()
+    return response
+
 @server.PromptServer.instance.routes.get("/localloragallery/get_loras")
+@timed_route
 async def get_loras_endpoint(request):
     try:
-        filter_tags_str = request.query.get('filter_tag', '').strip().lower()
-        filter_tags = [tag.strip() for tag in filter_tags_str.split(',') if tag.strip()]
-        filter_mode = request.query.get('mode', 'OR').upper()
-        filter_folder = request.query.get('folder', '').strip()
-        name_filter = request.query.get('name_filter', '').strip().lower()
-        selected_loras = request.query.getall('selected_loras', [])
-        
         page = int(request.query.get('page', 1))
         per_page = int(request.query.get('per_page', 50))
 
-        lora_files = folder_paths.get_filename_list("loras")
-        lora_roots = folder_paths.get_folder_paths("loras")
-        metadata = load_metadata()
-        all_folders = set()
-
-        filtered_loras = []
-        for lora in lora_files:
-            lora_full_path = folder_paths.get_full_path("loras", lora)
-            if not lora_full_path: continue
-
-            this_lora_root = None
-            for root in lora_roots:
-                if os.path.normpath(lora_full_path).startswith(os.path.normpath(root)):
-                    this_lora_root = root
-                    break
-            
-            if not this_lora_root:
-                print(f"Local Lora Gallery: Could not find a root folder for {lora_full_path}. Skipping.")
-                continue
-
-            relative_path = os.path.relpath(os.path.dirname(lora_full_path), this_lora_root)
-            folder = "." if relative_path == "." else relative_path
-            all_folders.add(folder)
-
-            if name_filter and name_filter not in lora.lower():
-                continue
-
-            if filter_folder and filter_folder != folder:
-                continue
-
-            lora_meta = metadata.get(lora, {})
-            tags = [t.lower() for t in lora_meta.get('tags', [])]
-
-            if filter_tags:
-                if filter_mode == 'AND':
-                    if not all(ft in tags for ft in filter_tags):
-                        continue
-                else:
-                    if not any(ft in tags for ft in filter_tags):
-                        continue
-            
-            filtered_loras.append(lora)
-
-        pinned_items_dict = {name: None for name in selected_loras}
-        remaining_items = []
-        for lora in filtered_loras:
-            if lora in pinned_items_dict:
-                pinned_items_dict[lora] = lora
-            else:
-                remaining_items.append(lora)
-
-        pinned_items = [lora for lora in selected_loras if pinned_items_dict.get(lora)]
+        etag = await run_blocking("catalog", catalog_etag, request)
+        if etag_matches(request, etag):
+            return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
-        remaining_items.sort(key=lambda x: x.lower())
-        final_lora_list = pinned_items + remaining_items
+        lora_query = await prepare_lora_query(request.query)
+        final_lora_list, tag_facets, all_folders = await run_blocking("catalog", run_lora_query, lora_query)
 
         total_loras = len(final_lora_list)
         total_pages = (total_loras + per_page - 1) // per_page
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
         paginated_loras = final_lora_list[start_index:end_index]
+        await ensure_lora_architectures(paginated_loras)
 
-        lora_info_list = []
-        for lora in paginated_loras:
-            lora_meta = metadata.get(lora, {})
-            preview_url, preview_type = get_lora_preview_asset_info(lora)
-            
-            lora_info_list.append({
-                "name": lora,
-                "preview_url": preview_url or "",
-                "preview_type": preview_type,
-                "tags": lora_meta.get('tags', []),
-                "trigger_words": lora_meta.get('trigger_words', ''),
-                "download_url": lora_meta.get('download_url', ''),
-            })
-
-        sorted_folders = sorted(list(all_folders), key=lambda s: s.lower())
-        
-        return web.json_response({
+        with gallery_metrics.time("localloragallery_phase_seconds", phase="preview_lookup"):
+            lora_info_list = await run_blocking("catalog", lambda: [lora_card_info(entry) for entry in paginated_loras])
+        catalog_watcher.ensure_started()
+
+        return listing_json_response(request, {
             "loras": lora_info_list, 
-            "folders": sorted_folders,
+            "folders": all_folders,
+            "tag_facets": tag_facets,
             "total_pages": total_pages,
             "current_page": page
-        })
+        }, etag)
     except Exception as e:
         import traceback
         print(f"Error in get_loras_endpoint: {traceback.format_exc()}")
         return web.json_response({"error": str(e)}, status=500)
 
 @server.PromptServer.instance.routes.get("/localloragallery/preview")
+@timed_route
 async def get_preview_image(request):
     filename = request.query.get('filename')
     lora_name = request.query.get('lora_name')
 
     if not filename or not lora_name or ".." in filename or "/" in filename or "\\" in filename:
         return web.Response(status=403)
+
+    size = request.query.get('size')
+    if size and not (size.isascii() and size.isdigit()):
+        return web.Response(status=400, text="size must be a positive integer.")
     
     try:
         lora_name_decoded = urllib.parse.unquote_plus(lora_name)
         filename_decoded = urllib.parse.unquote_plus(filename)
 
-        lora_full_path = folder_paths.get_full_path("loras", lora_name_decoded)
+        lora_full_path = await run_blocking("catalog", resolve_lora_path, lora_name_decoded)
         if not lora_full_path:
             return web.Response(status=404, text=f"Lora '{lora_name_decoded}' not found.")
         
         image_path = os.path.join(os.path.dirname(lora_full_path), filename_decoded)
-        if os.path.exists(image_path):
-            return web.FileResponse(image_path)
+        if await run_blocking("files", os.path.exists, image_path):
+            # A preview edited in place keeps its directory's mtime, so the catalog (and the URL's v=)
+            # may not notice; browsers revalidate every time against FileResponse's ETag/Last-Modified.
+            cache_control = "no-cache"
+            if size and os.path.splitext(image_path)[1].lower() in IMAGE_EXTENSIONS:
+                size = ThumbnailCache.snap_size(int(size))
+                loop = asyncio.get_running_loop()
+                thumbnail_path = await loop.run_in_executor(thumbnail_executor, thumbnail_cache.get, image_path, size)
+                if thumbnail_path:
+                    return web.FileResponse(thumbnail_path, headers={"Content-Type": "image/webp", "Cache-Control": cache_control})
+            return web.FileResponse(image_path, headers={"Cache-Control": cache_control})
         else:
             return web.Response(status=404, text=f"Preview '{filename_decoded}' not found.")
             
@@ -395,6 +2748,7 @@ async def get_preview_image(request):
         return web.json_response({"error": str(e)}, status=500)
 
 @server.PromptServer.instance.routes.post("/localloragallery/set_ui_state")
+@timed_route
 async def set_ui_state(request):
     try:
         data = await request.json()
@@ -405,16 +2759,13 @@ async def set_ui_state(request):
         if not gallery_id: return web.Response(status=400)
 
         node_key = f"{gallery_id}_{node_id}"
-        ui_states = load_ui_state()
-        if node_key not in ui_states:
-            ui_states[node_key] = {}
-        ui_states[node_key].update(state)
-        save_ui_state(ui_states)
+        await run_blocking("metadata", ui_state_buffer.update, node_key, state)
         return web.json_response({"status": "ok"})
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
 @server.PromptServer.instance.routes.get("/localloragallery/get_ui_state")
+@timed_route
 async def get_ui_state(request):
     try:
         node_id = request.query.get('node_id')
@@ -424,13 +2775,13 @@ async def get_ui_state(request):
             return web.json_response({"error": "node_id or gallery_id is required"}, status=400)
 
         node_key = f"{gallery_id}_{node_id}"
-        ui_states = load_ui_state()
-        node_state = ui_states.get(node_key, {"is_collapsed": False})
+        node_state = await run_blocking("metadata", ui_state_buffer.get, node_key, {"is_collapsed": False})
         return web.json_response(node_state)
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
 @server.PromptServer.instance.routes.post("/localloragallery/update_metadata")
+@timed_route
 async def update_lora_metadata(request):
     try:
         data = await request.json()
@@ -442,39 +2793,377 @@ async def update_lora_metadata(request):
         if not lora_name:
             return web.json_response({"status": "error", "message": "Missing lora_name"}, status=400)
         
-        metadata = load_metadata()
-        if lora_name not in metadata:
-            metadata[lora_name] = {}
-        
+        fields = {}
         if tags is not None:
-            metadata[lora_name]['tags'] = [str(tag).strip() for tag in tags if str(tag).strip()]
+            fields['tags'] = [str(tag).strip() for tag in tags if str(tag).strip()]
         
         if trigger_words is not None:
-            metadata[lora_name]['trigger_words'] = str(trigger_words)
+            fields['trigger_words'] = str(trigger_words)
 
         if download_url is not None:
-            metadata[lora_name]['download_url'] = str(download_url)
+            fields['download_url'] = str(download_url)
 
-        save_metadata(metadata)
+        await run_blocking("metadata", metadata_store.update, "metadata", lora_name, fields)
         return web.json_response({"status": "ok"})
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
     
 @server.PromptServer.instance.routes.get("/localloragallery/get_all_tags")
+@timed_route
 async def get_all_tags(request):
     try:
-        metadata = load_metadata()
-        all_tags = set(tag for item_meta in metadata.values() if isinstance(item_meta.get("tags"), list) for tag in item_meta["tags"])
-        return web.json_response({"tags": sorted(list(all_tags), key=lambda s: s.lower())})
+        lora_query = await prepare_lora_query(request.query)
+        _, tag_facets, _ = await run_blocking("catalog", run_lora_query, lora_query)
+        return web.json_response({"tags": [tag for tag, _ in tag_facets], "tag_facets": tag_facets})
+    except Exception as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/localloragallery/similar")
+@timed_route
+async def get_similar_loras(request):
+    lora_name = request.query.get('lora_name')
+    if not lora_name:
+        return web.json_response({"status": "error", "message": "Missing lora_name"}, status=400)
+    try:
+        limit = max(1, min(int(request.query.get('limit', SIMILAR_DEFAULT_LIMIT)), SIMILAR_MAX_LIMIT))
+    except ValueError:
+        return web.json_response({"status": "error", "message": "limit must be an integer"}, status=400)
+
+    try:
+        matches = await run_blocking("catalog", lora_catalog.similar, lora_name, limit)
+        if matches is None:
+            return web.json_response({"status": "error", "message": "LoRA not found"}, status=404)
+        await ensure_lora_architectures([entry for entry, _ in matches])
+        similar = await run_blocking("catalog", lambda: [{**lora_card_info(entry), "score": round(score, 4)} for entry, score in matches])
+        return web.json_response({"lora_name": lora_name, "similar": similar})
     except Exception as e:
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+LORA_WEIGHT_CACHE_BUDGET = int(os.environ.get("LOCAL_LORA_GALLERY_LORA_CACHE_MB", "2048")) * 1024 * 1024
+
+class LoraWeightCache:
+    """Process-wide LRU of loaded LoRA state dicts, shared by every gallery node.
+
+    ComfyUI's LoraLoader only remembers the last file it loaded, so a stack of
+    LoRAs is re-read from disk on every run. Entries here are keyed by path,
+    mtime and size, so an edited file is reloaded, and the least recently used
+    ones are dropped once the byte budget is exceeded. Concurrent loads of one
+    file (a prefetch racing the prompt) share a single read.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _state_dict_bytes(state_dict):
+        total = 0
+        for tensor in state_dict.values():
+            if hasattr(tensor, "nelement") and hasattr(tensor, "element_size"):
+                total += tensor.nelement() * tensor.element_size()
+            elif hasattr(tensor, "__len__"):
+                total += len(tensor)
+        return total
+
+    def get(self, lora_path):
+        stat = os.stat(lora_path)
+        key = (lora_path, stat.st_mtime_ns, stat.st_size)
+        while True:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached[0]
+                event = self._inflight.get(key)
+                if event is None:
+                    self.misses += 1
+                    event = self._inflight[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            state_dict = comfy.utils.load_torch_file(lora_path, safe_load=True)
+            size = self._state_dict_bytes(state_dict)
+            if size > self.budget:
+                return state_dict
+
+            with self._lock:
+                for stale_key in [k for k in self._entries if k[0] == lora_path and k != key]:
+                    self._bytes -= self._entries.pop(stale_key)[1]
+                if key not in self._entries:
+                    self._entries[key] = (state_dict, size)
+                    self._bytes += size
+                while self._bytes > self.budget and len(self._entries) > 1:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+                    self.evictions += 1
+            return state_dict
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+lora_weight_cache = LoraWeightCache(LORA_WEIGHT_CACHE_BUDGET)
+
+def collect_lora_weight_cache_metrics():
+    stats = lora_weight_cache.stats()
+    return [
+        ("localloragallery_cache_requests_total", {"cache": "lora_weights", "result": "hit"}, stats["hits"]),
+        ("localloragallery_cache_requests_total", {"cache": "lora_weights", "result": "miss"}, stats["misses"]),
+        ("localloragallery_lora_weight_cache_bytes", {}, stats["bytes"]),
+    ]
+
+gallery_metrics.add_collector(collect_lora_weight_cache_metrics)
+
+LORA_PREFETCH_BUDGET = int(os.environ.get("LOCAL_LORA_GALLERY_PREFETCH_MB", "1024")) * 1024 * 1024
+
+# One thread, so prefetching reads files one after another instead of competing with the prompt for the disk.
+prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lora_gallery_prefetch")
+prefetch_jobs = {}
+
+def plan_lora_prefetch(lora_names):
+    """Blocking: returns ([(name, path, mode)], missing names) for a selection.
+
+    LoRAs are loaded into `lora_weight_cache` in selection order until
+    LORA_PREFETCH_BUDGET (capped by the cache budget) is used up; the rest
+    only get a page-cache readahead hint.
+    """
+    budget = min(LORA_PREFETCH_BUDGET, lora_weight_cache.budget)
+    plan, missing = [], []
+    used = 0
+    for lora_name in lora_names:
+        lora_path = resolve_lora_path(lora_name)
+        try:
+            size = os.path.getsize(lora_path) if lora_path else None
+        except OSError:
+            size = None
+        if size is None:
+            missing.append(lora_name)
+            continue
+        if used + size <= budget:
+            used += size
+            plan.append((lora_name, lora_path, "load"))
+        else:
+            plan.append((lora_name, lora_path, "readahead"))
+    return plan, missing
+
+def readahead_lora_file(lora_path):
+    """Asks the OS to start reading a file into the page cache; a no-op where posix_fadvise is unavailable."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(lora_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+    return True
+
+async def run_lora_prefetch(plan):
+    loop = asyncio.get_running_loop()
+    # Readahead hints for the whole stack go out first, so the kernel reads ahead while earlier files are loaded.
+    for lora_name, lora_path, _ in plan:
+        try:
+            if await loop.run_in_executor(prefetch_executor, readahead_lora_file, lora_path):
+                gallery_metrics.inc("localloragallery_prefetch_files_total", mode="readahead")
+        except OSError as e:
+            print(f"Local Lora Gallery: Readahead failed for {lora_name}: {e}")
+    for lora_name, lora_path, mode in plan:
+        if mode != "load":
+            continue
+        try:
+            await loop.run_in_executor(prefetch_executor, lora_weight_cache.get, lora_path)
+            gallery_metrics.inc("localloragallery_prefetch_files_total", mode="load")
+        except Exception as e:
+            print(f"Local Lora Gallery: Prefetch failed for {lora_name}: {e}")
+
+@server.PromptServer.instance.routes.post("/localloragallery/prefetch")
+@timed_route
+async def prefetch_loras(request):
+    try:
+        data = await request.json()
+        gallery_id = data.get("gallery_id")
+        if not gallery_id:
+            return web.json_response({"status": "error", "message": "Missing gallery_id"}, status=400)
+        node_key = f"{gallery_id}_{data.get('node_id')}"
+        lora_names = tuple(dict.fromkeys(str(name) for name in data.get("lora_names") or []))
+
+        # A changed selection cancels this gallery's previous prefetch; an unchanged one keeps it running.
+        previous = prefetch_jobs.get(node_key)
+        if previous is not None and previous["lora_names"] == lora_names and not previous["task"].done():
+            return web.json_response({"status": "ok", "started": False, **previous["summary"]})
+        if previous is not None:
+            previous["task"].cancel()
+
+        plan, missing = await run_blocking("catalog", plan_lora_prefetch, lora_names)
+        summary = {
+            "load": [name for name, _, mode in plan if mode == "load"],
+            "readahead": [name for name, _, mode in plan if mode == "readahead"],
+            "missing": missing,
+        }
+        task = asyncio.create_task(run_lora_prefetch(plan))
+        job = prefetch_jobs[node_key] = {"lora_names": lora_names, "task": task, "summary": summary}
+        task.add_done_callback(lambda _: prefetch_jobs.pop(node_key, None) if prefetch_jobs.get(node_key) is job else None)
+        return web.json_response({"status": "ok", "started": True, **summary})
+    except Exception as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/localloragallery/metrics")
+@timed_route
+async def get_metrics(request):
+    return web.Response(body=gallery_metrics.render().encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+@server.PromptServer.instance.routes.get("/localloragallery/lora_cache_stats")
+@timed_route
+async def get_lora_cache_stats(request):
+    return web.json_response(lora_weight_cache.stats())
+
+class CachedLoraLoader(LoraLoader):
+    """LoraLoader that takes its weights from the shared LoraWeightCache."""
+
+    def load_lora(self, model, clip, lora_name, strength_model, strength_clip):
+        if strength_model == 0 and strength_clip == 0:
+            return (model, clip)
+        lora_path = folder_paths.get_full_path("loras", lora_name)
+        if lora_path is None or lora_weight_cache.budget <= 0:
+            return super().load_lora(model, clip, lora_name, strength_model, strength_clip)
+        lora = lora_weight_cache.get(lora_path)
+        model_lora, clip_lora = comfy.sd.load_lora_for_models(model, clip, lora, strength_model, strength_clip)
+        return (model_lora, clip_lora)
+
+class CachedLoraLoaderModelOnly(CachedLoraLoader, LoraLoaderModelOnly):
+    pass
+
+LORA_STACK_MEMO_MAX_ENTRIES = 16
+
+class LoraStackMemo:
+    """Remembers the patched (MODEL, CLIP) produced by applying a stack to a base model.
+
+    Bases and results are held only through weakrefs: patched clones keep their
+    parent alive, so a strong reference to a result would pin the base
+    checkpoint too. An entry is a hit only while ComfyUI itself still holds the
+    result and the base ids still name the same objects.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(model, clip, lora_stack):
+        """Returns a memo key, or None if a stack entry cannot be resolved to a file."""
+        parts = []
+        for lora_path, strength_model, strength_clip in lora_stack:
+            full_path = folder_paths.get_full_path("loras", lora_path)
+            if full_path is None:
+                return None
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                return None
+            parts.append((full_path, float(strength_model), float(strength_clip), stat.st_mtime_ns, stat.st_size))
+        return (id(model), id(clip) if clip is not None else None, tuple(parts))
+
+    @staticmethod
+    def _ref(obj):
+        return (lambda: None) if obj is None else weakref.ref(obj)
+
+    @staticmethod
+    def _alive(refs, objects):
+        return all(ref() is obj for ref, obj in zip(refs, objects))
+
+    def get(self, key, model, clip):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            base_refs, result_refs = entry
+            result = tuple(ref() for ref in result_refs)
+            if not self._alive(base_refs, (model, clip)) or result[0] is None or (clip is not None and result[1] is None):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, model, clip, result):
+        try:
+            entry = ((self._ref(model), self._ref(clip)), tuple(self._ref(obj) for obj in result))
+        except TypeError:
+            return
+        with self._lock:
+            for stale in [k for k, (_, result_refs) in self._entries.items() if result_refs[0]() is None]:
+                del self._entries[stale]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+lora_stack_memo = LoraStackMemo(LORA_STACK_MEMO_MAX_ENTRIES)
+
 class BaseLoraGallery:
     """Base class for common functionality."""
+
+    # Whether the node's output depends on a per-LoRA "strength_clip".
+    USES_STRENGTH_CLIP = False
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return kwargs.get("selection_data", "")
+        """Fingerprints the effective stack rather than the raw selection JSON.
+
+        UI-only fields and key order are ignored, while a replaced LoRA file or
+        edited trigger words change the fingerprint.
+        """
+        selection_data = kwargs.get("selection_data", "")
+        try:
+            lora_configs = json.loads(selection_data)
+        except (TypeError, ValueError):
+            return selection_data
+        if not isinstance(lora_configs, list):
+            return selection_data
+
+        effective = []
+        for config in lora_configs:
+            if not isinstance(config, dict) or not config.get('on', True) or not config.get('lora'):
+                continue
+            lora_name = config['lora']
+            try:
+                strength_model = float(config.get('strength', 1.0))
+                strength_clip = float(config.get('strength_clip', strength_model)) if cls.USES_STRENGTH_CLIP else None
+            except (TypeError, ValueError):
+                strength_model, strength_clip = config.get('strength'), config.get('strength_clip')
+            use_trigger = bool(config.get('use_trigger', True))
+
+            entry = lora_catalog.get_entry(lora_name)
+            lora_path = entry["path"] if entry else folder_paths.get_full_path("loras", lora_name)
+            try:
+                stat = os.stat(lora_path) if lora_path else None
+                file_signature = [stat.st_size, stat.st_mtime_ns] if stat else None
+            except OSError:
+                file_signature = None
+            trigger_words = (entry["meta"] if entry else {}).get('trigger_words', '') if use_trigger else None
+
+            effective.append([lora_name, strength_model, strength_clip, use_trigger, file_signature, trigger_words])
+
+        canonical = json.dumps(effective, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
     def _get_nunchaku_model_type(self, model):
         """Checks if the model is a Nunchaku-accelerated model and returns its type."""
@@ -496,6 +3185,8 @@ class BaseLoraGallery:
         return 'none'
 
 class LocalLoraGallery(BaseLoraGallery):
+    USES_STRENGTH_CLIP = True
+
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -537,7 +3228,7 @@ class LocalLoraGallery(BaseLoraGallery):
             loader_instance = NunchakuZImageLoraLoader()
             print("LocalLoraGallery: Using NunchakuZImageLoraLoader.")
         else:
-            loader_instance = LoraLoader()
+            loader_instance = CachedLoraLoader()
             print("LocalLoraGallery: Using standard LoraLoader.")
 
         for config in lora_configs:
@@ -615,7 +3306,7 @@ class LocalLoraGalleryModelOnly(BaseLoraGallery):
             loader_instance = NunchakuZImageLoraLoader()
             print("LocalLoraGalleryModelOnly: Using NunchakuZImageLoraLoader.")
         else:
-            loader_instance = LoraLoaderModelOnly()
+            loader_instance = CachedLoraLoaderModelOnly()
             print("LocalLoraGalleryModelOnly: Using standard LoraLoaderModelOnly.")
 
         for config in lora_configs:
@@ -741,6 +3432,13 @@ class LocalLoraGalleryStackApply(BaseLoraGallery):
         if not lora_stack:
             return (model, clip)
 
+        memo_key = lora_stack_memo.make_key(model, clip, lora_stack)
+        if memo_key is not None:
+            memoized = lora_stack_memo.get(memo_key, model, clip)
+            if memoized is not None:
+                print(f"LocalLoraGalleryStackApply: Reused {len(lora_stack)} LoRAs from stack memo.")
+                return memoized
+
         current_model = model
         current_clip = clip
         applied_count = 0
@@ -757,7 +3455,7 @@ class LocalLoraGalleryStackApply(BaseLoraGallery):
             loader_instance = NunchakuZImageLoraLoader()
             print("LocalLoraGalleryStackApply: Using NunchakuZImageLoraLoader.")
         else:
-            loader_instance = LoraLoader()
+            loader_instance = CachedLoraLoader()
             print("LocalLoraGalleryStackApply: Using standard LoraLoader.")
 
         for lora_path, strength_model, strength_clip in lora_stack:
@@ -770,7 +3468,7 @@ class LocalLoraGalleryStackApply(BaseLoraGallery):
                             current_model, current_clip, lora_path, strength_model, strength_clip
                         )
                     else:
-                        (current_model,) = LoraLoaderModelOnly().load_lora_model_only(
+                        (current_model,) = CachedLoraLoaderModelOnly().load_lora_model_only(
                             current_model, lora_path, strength_model
                         )
                 
@@ -779,6 +3477,8 @@ class LocalLoraGalleryStackApply(BaseLoraGallery):
                 print(f"LocalLoraGalleryStackApply: Failed to apply LoRA '{lora_path}': {e}")
 
         print(f"LocalLoraGalleryStackApply: Applied {applied_count} LoRAs from stack.")
+        if memo_key is not None and applied_count == len(lora_stack):
+            lora_stack_memo.put(memo_key, model, clip, (current_model, current_clip))
         return (current_model, current_clip)
 
 
@@ -0,0 +1,210 @@
+"""Times the gallery's hot paths against synthetic libraries.
+
+    python benchmarks/bench_gallery.py --sizes 1000,10000 --output results.json
+    python benchmarks/bench_gallery.py --sizes 1000 --baseline results.json
+
+Handlers are called directly with lightweight request objects, so the numbers
+exclude HTTP overhead. Query results are normally cached per catalog version;
+the filter cases clear that cache before every call to measure the filtering
+itself, while "page 1 (cached)" shows the paging cost a user actually sees.
+The thumbnail cases request full-size previews at grid size, each one once
+while cold and then again from the cache. Cases that need something the loaded
+module doesn't have (e.g. an older commit without the catalog) are skipped, so
+any revision can be benchmarked for --baseline comparisons.
+
+The report is a single JSON document (library size -> case -> timings in ms).
+With --baseline, a per-case ratio against an earlier report is printed to
+stderr, where values above 1.0 are slowdowns.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from multidict import MultiDict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comfy_stubs import REPO_DIR, load_gallery
+from generate_library import PNG_1X1, generate_library
+
+class BenchRequest:
+    """Just enough of aiohttp's Request for the gallery handlers."""
+
+    def __init__(self, path, query=None, body=None):
+        self.path = path
+        self.query = MultiDict(query or {})
+        self.headers = MultiDict()
+        self._body = body
+        self.can_read_body = body is not None
+
+    async def json(self):
+        return self._body
+
+async def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append((time.perf_counter() - start) * 1000)
+    first = timings[0]
+    timings.sort()
+    return {
+        "n": repeat,
+        "first_ms": round(first, 3),
+        "min_ms": round(timings[0], 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+def full_size_previews(lora_root, names):
+    """Returns (lora name, preview filename) for every LoRA whose preview is a real image rather than a 1x1 placeholder."""
+    previews = []
+    for name in names:
+        stem = os.path.splitext(name)[0]
+        for suffix in (".png", ".preview.png"):
+            path = os.path.join(lora_root, stem + suffix)
+            if os.path.isfile(path) and os.path.getsize(path) > len(PNG_1X1):
+                previews.append((name, os.path.basename(path)))
+                break
+    return previews
+
+async def run_cases(gallery, lora_root, names, metadata, repeat):
+    rng = random.Random(1)
+    results = {}
+    query_cache_lock = getattr(gallery, "_query_cache_lock", None)
+    lora_catalog = getattr(gallery, "lora_catalog", None)
+
+    def uncached(handler, path, query):
+        def call():
+            if query_cache_lock is not None:
+                with query_cache_lock:
+                    gallery._query_cache.clear()
+            return handler(BenchRequest(path, query))
+        return call
+
+    if lora_catalog is not None:
+        def invalidate_and_snapshot():
+            lora_catalog.invalidate()
+            lora_catalog.snapshot()
+
+        results["catalog build (cold)"] = await measure(invalidate_and_snapshot, max(1, repeat // 10))
+
+    tag_counts = {}
+    for lora_meta in metadata.values():
+        for tag in lora_meta["tags"]:
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    top_tags = sorted(tag_counts, key=tag_counts.get, reverse=True)[:3]
+    folder = next((os.path.dirname(n) for n in names if os.path.dirname(n)), "")
+
+    get_loras = gallery.get_loras_endpoint
+    query_cases = {
+        "get_loras page 1": {"page": "1"},
+        "get_loras page 5": {"page": "5"},
+        "get_loras tag": {"filter_tag": top_tags[0]},
+        "get_loras tags AND": {"filter_tag": ",".join(top_tags[:2]), "mode": "AND"},
+        "get_loras excluded tag": {"filter_tag": f"-{top_tags[0]}"},
+        "get_loras folder": {"folder": folder},
+        "get_loras search": {"name_filter": "dragon knight"},
+        "get_loras short search": {"name_filter": "dr"},
+        "get_loras base model": {"base_model": "SDXL"},
+        "get_loras combined": {"filter_tag": top_tags[1], "name_filter": "neon", "base_model": "Flux", "page": "2"},
+    }
+    for case, query in query_cases.items():
+        results[case] = await measure(uncached(get_loras, "/localloragallery/get_loras", query), repeat)
+    results["get_loras page 1 (cached)"] = await measure(lambda: get_loras(BenchRequest("/localloragallery/get_loras", {"page": "1"})), repeat)
+
+    results["get_all_tags"] = await measure(uncached(gallery.get_all_tags, "/localloragallery/get_all_tags", {}), repeat)
+    results["get_all_tags filtered"] = await measure(uncached(gallery.get_all_tags, "/localloragallery/get_all_tags", {"filter_tag": top_tags[0]}), repeat)
+
+    page_names = names[:50]
+    results["preview lookup x50"] = await measure(lambda: [gallery.get_lora_preview_asset_info(n) for n in page_names], repeat)
+
+    previews = full_size_previews(lora_root, names)
+    if previews:
+        cold = iter(previews)
+
+        def thumbnail(name, filename):
+            return gallery.get_preview_image(BenchRequest("/localloragallery/preview", {"filename": filename, "lora_name": name, "size": "256"}))
+        results["preview thumbnail (cold)"] = await measure(lambda: thumbnail(*next(cold)), min(repeat, len(previews)))
+        results["preview thumbnail (cached)"] = await measure(lambda: thumbnail(*previews[0]), repeat)
+
+    def update_metadata():
+        body = {"lora_name": rng.choice(names), "tags": rng.sample(top_tags, 2), "trigger_words": "bench"}
+        return gallery.update_lora_metadata(BenchRequest("/localloragallery/update_metadata", body=body))
+    results["update_metadata"] = await measure(update_metadata, repeat)
+
+    selection = json.dumps([{"lora": n, "strength": 0.8, "use_trigger": True} for n in rng.sample(names, 5)])
+    node = gallery.LocalLoraGallery()
+    results["IS_CHANGED (5 LoRAs)"] = await measure(lambda: gallery.LocalLoraGallery.IS_CHANGED(selection_data=selection), repeat)
+    results["load_loras (5 LoRAs)"] = await measure(lambda: node.load_loras("model", "clip", "1", selection), repeat)
+    return results
+
+def git_version():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_comparison(report, baseline):
+    for size, cases in report["libraries"].items():
+        base_cases = baseline.get("libraries", {}).get(size)
+        if not base_cases:
+            continue
+        print(f"\n{size} LoRAs (p50 ratio vs {baseline.get('version', 'baseline')}):", file=sys.stderr)
+        for case, timing in cases.items():
+            base = base_cases.get(case)
+            if base and base["p50_ms"] > 0:
+                print(f"  {case:32s} {timing['p50_ms']:10.3f} ms  x{timing['p50_ms'] / base['p50_ms']:.2f}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated library sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "libraries": {},
+    }
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        with tempfile.TemporaryDirectory() as tmp:
+            lora_root = os.path.join(tmp, "loras")
+            node_dir = os.path.join(tmp, "node")
+            os.makedirs(node_dir)
+            metadata_path = os.path.join(node_dir, "lora_gallery_metadata.json")
+            names = generate_library(lora_root, size, metadata_path=metadata_path)
+            with open(metadata_path, encoding="utf-8") as f:
+                metadata = json.load(f)
+            # The node logs to stdout; keep stdout clean for the report.
+            with contextlib.redirect_stdout(sys.stderr):
+                gallery = load_gallery(lora_root, node_dir)
+                report["libraries"][str(size)] = asyncio.run(run_cases(gallery, lora_root, names, metadata, args.repeat))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
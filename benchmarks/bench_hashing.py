@@ -0,0 +1,55 @@
+"""Compares hashing throughput per algorithm on a large file.
+
+    python benchmarks/bench_hashing.py --size-mb 2048
+
+Each algorithm is timed on its own and all of them together in one
+calculate_file_digests pass. The file is read once up front so every run is
+served from the page cache and measures hashing rather than disk speed.
+Prints one JSON object per line.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comfy_stubs import load_gallery
+
+def write_test_file(path, size_mb):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gallery = load_gallery(os.path.join(tmp, "loras"), os.path.join(tmp, "node"))
+        path = os.path.join(tmp, "large.safetensors")
+        write_test_file(path, args.size_mb)
+        gallery.calculate_file_digests(path, ["crc32"])
+
+        runs = [[a] for a in gallery.SUPPORTED_HASH_ALGORITHMS] + [list(gallery.HASH_ALGORITHMS)]
+        for algorithms in runs:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                gallery.calculate_file_digests(path, algorithms)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(json.dumps({
+                "benchmark": "hashing",
+                "algorithms": algorithms,
+                "size_mb": args.size_mb,
+                "seconds": round(best, 4),
+                "mb_per_s": round(args.size_mb / best, 1),
+            }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Minimal stand-ins for the ComfyUI modules Local_Lora_Gallery imports.
+
+The gallery module is copied into a scratch directory before it is imported,
+because it keeps its metadata database and caches next to its own file and a
+benchmark must never touch a real install's data.
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import types
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def install_stubs(lora_root):
+    from aiohttp import web
+
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.supported_pt_extensions = {".ckpt", ".pt", ".pt2", ".bin", ".pth", ".safetensors", ".pkl", ".sft"}
+    folder_paths.folder_names_and_paths = {"loras": ([lora_root], folder_paths.supported_pt_extensions)}
+
+    def get_folder_paths(folder_name):
+        return list(folder_paths.folder_names_and_paths[folder_name][0])
+
+    def get_full_path(folder_name, filename):
+        for root in get_folder_paths(folder_name):
+            path = os.path.join(root, filename)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get_full_path_or_raise(folder_name, filename):
+        path = get_full_path(folder_name, filename)
+        if path is None:
+            raise FileNotFoundError(filename)
+        return path
+
+    folder_paths.get_folder_paths = get_folder_paths
+    folder_paths.get_full_path = get_full_path
+    folder_paths.get_full_path_or_raise = get_full_path_or_raise
+
+    server = types.ModuleType("server")
+
+    class PromptServer:
+        instance = None
+
+        def __init__(self):
+            self.routes = web.RouteTableDef()
+
+        def send_sync(self, event, data, sid=None):
+            pass
+
+    PromptServer.instance = PromptServer()
+    server.PromptServer = PromptServer
+
+    comfy = types.ModuleType("comfy")
+    comfy_utils = types.ModuleType("comfy.utils")
+    comfy_sd = types.ModuleType("comfy.sd")
+
+    def load_torch_file(path, safe_load=False):
+        with open(path, "rb") as f:
+            return {"weights": f.read()}
+
+    def load_lora_for_models(model, clip, lora, strength_model, strength_clip):
+        return (model, clip)
+
+    comfy_utils.load_torch_file = load_torch_file
+    comfy_sd.load_lora_for_models = load_lora_for_models
+    comfy.utils, comfy.sd = comfy_utils, comfy_sd
+
+    nodes = types.ModuleType("nodes")
+
+    class LoraLoader:
+        def load_lora(self, model, clip, lora_name, strength_model, strength_clip):
+            lora = load_torch_file(get_full_path_or_raise("loras", lora_name))
+            return load_lora_for_models(model, clip, lora, strength_model, strength_clip)
+
+    class LoraLoaderModelOnly(LoraLoader):
+        def load_lora_model_only(self, model, lora_name, strength_model):
+            return (self.load_lora(model, None, lora_name, strength_model, 0)[0],)
+
+    nodes.LoraLoader = LoraLoader
+    nodes.LoraLoaderModelOnly = LoraLoaderModelOnly
+    nodes.NODE_CLASS_MAPPINGS = {}
+
+    sys.modules.update({
+        "folder_paths": folder_paths,
+        "server": server,
+        "comfy": comfy,
+        "comfy.utils": comfy_utils,
+        "comfy.sd": comfy_sd,
+        "nodes": nodes,
+    })
+
+def load_gallery(lora_root, work_dir, copy_module=True):
+    """Installs the stubs and imports a scratch copy of Local_Lora_Gallery.py from `work_dir`.
+
+    Pass copy_module=False to import a copy that is already there, e.g. from
+    several processes sharing one `work_dir`.
+    """
+    install_stubs(lora_root)
+    os.makedirs(work_dir, exist_ok=True)
+    module_path = os.path.join(work_dir, "Local_Lora_Gallery.py")
+    if copy_module:
+        shutil.copyfile(os.path.join(REPO_DIR, "Local_Lora_Gallery.py"), module_path)
+    spec = importlib.util.spec_from_file_location("Local_Lora_Gallery", module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["Local_Lora_Gallery"] = module
+    spec.loader.exec_module(module)
+    return module
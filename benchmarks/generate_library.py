@@ -0,0 +1,145 @@
+"""Generates a synthetic LoRA library for benchmarking.
+
+    python benchmarks/generate_library.py /tmp/lora_lib --count 10000
+
+Files are real safetensors containers (a JSON header with kohya training
+metadata and SD1.5/SDXL/Flux-shaped keys, followed by a few bytes of tensor
+data) spread over nested folders. About a third get a preview image, some
+use the "name.preview.png" convention and a few get a video. One image preview
+in four is a full-size PNG so thumbnail generation has real work to do; the
+rest are 1x1 placeholders. A metadata JSON with tags and trigger words is
+written next to the library, in the format of lora_gallery_metadata.json.
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import zlib
+
+PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+FULL_SIZE_PREVIEW = (1216, 832)
+FULL_SIZE_PREVIEW_RATE = 0.25
+ARCHITECTURES = {
+    "SD1.5": [("lora_unet_down_blocks_0_attentions_0_transformer_blocks_0_attn2_to_k", 768),
+              ("lora_te_text_model_encoder_layers_0_mlp_fc1", 768)],
+    "SDXL": [("lora_unet_input_blocks_4_1_transformer_blocks_0_attn2_to_k", 2048),
+             ("lora_te1_text_model_encoder_layers_0_mlp_fc1", 768),
+             ("lora_te2_text_model_encoder_layers_0_mlp_fc1", 1280)],
+    "Flux": [("lora_unet_double_blocks_0_img_attn_qkv", 3072),
+             ("lora_unet_double_blocks_0_img_mlp_0", 3072),
+             ("lora_unet_double_blocks_0_txt_mod_lin", 3072),
+             ("lora_unet_single_blocks_0_linear1", 3072)],
+}
+KOHYA_BASE_MODEL_VERSIONS = {"SD1.5": "sd_v1", "SDXL": "sdxl_base_v1-0", "Flux": "flux1"}
+WORDS = [
+    "red", "blue", "silver", "neon", "forest", "city", "portrait", "armor", "dress", "smile",
+    "rain", "sunset", "anime", "photo", "sketch", "ink", "pixel", "cyber", "gothic", "retro",
+    "cat", "dragon", "robot", "knight", "witch", "ocean", "desert", "snow", "flower", "glow",
+]
+TAG_VOCABULARY = [f"{a} {b}" for a in WORDS[:20] for b in WORDS[20:]] + WORDS
+
+_full_size_png = None
+
+def full_size_png():
+    """Returns an RGB gradient PNG at FULL_SIZE_PREVIEW, built once with zlib so PIL isn't needed."""
+    global _full_size_png
+    if _full_size_png is None:
+        width, height = FULL_SIZE_PREVIEW
+        rows = bytearray()
+        for y in range(height):
+            rows.append(0)  # filter type: none
+            rows.extend(b"".join(bytes((x * 255 // width, y * 255 // height, (x ^ y) & 0xFF)) for x in range(width)))
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        _full_size_png = (b"\x89PNG\r\n\x1a\n"
+                          + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+                          + chunk(b"IDAT", zlib.compress(bytes(rows), 6))
+                          + chunk(b"IEND", b""))
+    return _full_size_png
+
+def make_header(rng, index, architecture):
+    rank = rng.choice([4, 8, 16, 32])
+    tensors = {}
+    offset = 0
+    for key, width in ARCHITECTURES[architecture]:
+        for suffix, shape in ((".lora_down.weight", [rank, width]), (".lora_up.weight", [width, rank])):
+            tensors[key + suffix] = {"dtype": "F16", "shape": shape, "data_offsets": [offset, offset + 16]}
+            offset += 16
+    concept = f"{rng.choice(WORDS)}{index}"
+    captions = {tag: rng.randint(1, 40) for tag in rng.sample(TAG_VOCABULARY, 6)}
+    tensors["__metadata__"] = {
+        "ss_output_name": concept,
+        "ss_base_model_version": KOHYA_BASE_MODEL_VERSIONS[architecture],
+        "ss_num_train_images": "40",
+        "ss_tag_frequency": json.dumps({f"10_{concept}": captions}),
+    }
+    return tensors, offset
+
+def write_safetensors(path, header, data_size):
+    raw_header = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw_header)))
+        f.write(raw_header)
+        f.write(b"\0" * data_size)
+
+def generate_library(root, count, seed=0, metadata_path=None):
+    """Writes `count` LoRAs under `root` and returns their names (relative paths)."""
+    rng = random.Random(seed)
+    # Separate stream, so adding full-size previews left names, tags and metadata unchanged for a given seed.
+    preview_rng = random.Random(seed + 1)
+    folder_count = max(1, int(count ** 0.5) // 2)
+    folders = ["."] + [os.path.join(f"group{i % 10}", f"set{i}") for i in range(folder_count)]
+    names = []
+    metadata = {}
+    for index in range(count):
+        folder = rng.choice(folders)
+        directory = os.path.join(root, folder)
+        os.makedirs(directory, exist_ok=True)
+        stem = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{index:06d}"
+        architecture = rng.choice(list(ARCHITECTURES))
+        header, data_size = make_header(rng, index, architecture)
+        write_safetensors(os.path.join(directory, stem + ".safetensors"), header, data_size)
+
+        roll = rng.random()
+        if roll < 0.25:
+            preview_name = stem + ".png"
+        elif roll < 0.33:
+            preview_name = stem + ".preview.png"
+        elif roll < 0.35:
+            preview_name = stem + ".mp4"
+        else:
+            preview_name = None
+        if preview_name:
+            full_size = preview_name.endswith(".png") and preview_rng.random() < FULL_SIZE_PREVIEW_RATE
+            with open(os.path.join(directory, preview_name), "wb") as f:
+                f.write(full_size_png() if full_size else PNG_1X1)
+
+        name = stem + ".safetensors" if folder == "." else os.path.join(folder, stem + ".safetensors")
+        names.append(name)
+        if rng.random() < 0.7:
+            # Zipf-like tag popularity, so facets and AND filters see realistic skew.
+            tags = sorted({TAG_VOCABULARY[min(int(rng.paretovariate(1.2)) - 1, len(TAG_VOCABULARY) - 1)] for _ in range(rng.randint(1, 5))})
+            metadata[name] = {"tags": tags, "trigger_words": f"{rng.choice(WORDS)}{index}, {rng.choice(WORDS)} style"}
+
+    if metadata_path:
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    names = generate_library(args.root, args.count, args.seed, os.path.join(args.root, "lora_gallery_metadata.json"))
+    print(f"Generated {len(names)} LoRAs under {args.root}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Hammers one metadata store and UI state file from several processes.
+
+    python benchmarks/stress_shared_metadata.py --workers 4 --writes 200 --backend sqlite
+
+Every worker imports the gallery from the same node directory, as ComfyUI
+workers sharing one install would, and merges worker-specific fields into a
+small shared set of LoRA records. Afterwards every field written by every
+worker must be stored, each worker must have seen the others' commits, and
+every worker's UI state node must survive. Prints one JSON object and exits
+non-zero on a lost update.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comfy_stubs import load_gallery
+
+def run_worker(worker_id, lora_root, work_dir, backend, writes, keys, barrier, results):
+    os.environ["LOCAL_LORA_GALLERY_METADATA_BACKEND"] = backend
+    gallery = load_gallery(lora_root, work_dir, copy_module=False)
+    store = gallery.metadata_store
+    barrier.wait()
+
+    start = time.perf_counter()
+    for i in range(writes):
+        store.update("metadata", keys[i % len(keys)], {f"worker{worker_id}_{i}": i})
+    elapsed = time.perf_counter() - start
+
+    gallery.ui_state_buffer.update(f"node-{worker_id}", {"page": worker_id})
+    gallery.ui_state_buffer.flush()
+    barrier.wait()
+
+    store.sync()
+    seen = sum(len(record) for record in store.all("metadata").values())
+    results.put({"worker": worker_id, "seconds": round(elapsed, 3), "fields_seen": seen})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--keys", type=int, default=5)
+    parser.add_argument("--backend", choices=("sqlite", "json"), default="sqlite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lora_root, work_dir = os.path.join(tmp, "loras"), os.path.join(tmp, "node")
+        os.makedirs(lora_root)
+        os.environ["LOCAL_LORA_GALLERY_METADATA_BACKEND"] = args.backend
+        gallery = load_gallery(lora_root, work_dir)
+        keys = [f"lora_{i:03d}.safetensors" for i in range(args.keys)]
+
+        ctx = multiprocessing.get_context("spawn")
+        barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+        workers = [
+            ctx.Process(target=run_worker, args=(i, lora_root, work_dir, args.backend, args.writes, keys, barrier, results))
+            for i in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        reports = sorted((results.get() for _ in workers), key=lambda r: r["worker"])
+        for worker in workers:
+            worker.join()
+
+        expected = args.workers * args.writes
+        gallery.metadata_store.sync()
+        stored = sum(len(record) for record in gallery.metadata_store.all("metadata").values())
+        ui_nodes = set(gallery.load_json_file(gallery.UI_STATE_FILE, {}))
+        missing_nodes = sorted(f"node-{i}" for i in range(args.workers) if f"node-{i}" not in ui_nodes)
+        ok = stored == expected and all(r["fields_seen"] == expected for r in reports) and not missing_nodes
+
+        print(json.dumps({
+            "backend": args.backend,
+            "expected_fields": expected,
+            "stored_fields": stored,
+            "missing_ui_nodes": missing_nodes,
+            "workers": reports,
+            "ok": ok,
+        }, indent=2))
+        sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,10 @@ const LocalLoraGalleryNode = {
     currentPage: 1,
     totalPages: 1,
     
-    async getLoras(filter_tag = "", mode = "OR", folder = "", page = 1, selected_loras = [], name_filter = "") {
+    async getLoras(filter_tag = "", mode = "OR", folder = "", page = 1, selected_loras = [], name_filter = "", base_model = "") {
         this.isLoading = true;
         try {
-            let url = `/localloragallery/get_loras?filter_tag=${encodeURIComponent(filter_tag)}&mode=${mode}&folder=${encodeURIComponent(folder)}&page=${page}&name_filter=${encodeURIComponent(name_filter)}`;
+            let url = `/localloragallery/get_loras?filter_tag=${encodeURIComponent(filter_tag)}&mode=${mode}&folder=${encodeURIComponent(folder)}&page=${page}&name_filter=${encodeURIComponent(name_filter)}&base_model=${encodeURIComponent(base_model)}`;
             selected_loras.forEach(lora => {
                 url += `&selected_loras=${encodeURIComponent(lora)}`;
             });
@@ -21,7 +21,7 @@ const LocalLoraGalleryNode = {
             return data;
         } catch (error) {
             console.error("LocalLoraGallery: Error fetching LoRAs:", error);
-            return { loras: [], folders: [], total_pages: 1, current_page: 1 };
+            return { loras: [], folders: [], tag_facets: [], total_pages: 1, current_page: 1 };
         } finally {
             this.isLoading = false;
         }
@@ -56,6 +56,18 @@ const LocalLoraGalleryNode = {
         }
     },
 
+    async prefetchLoras(nodeId, galleryId, loraNames) {
+        try {
+            await api.fetchApi("/localloragallery/prefetch", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ node_id: nodeId, gallery_id: galleryId, lora_names: loraNames }),
+            });
+        } catch(e) {
+            console.error("LocalLoraGallery: Failed to prefetch LoRAs", e);
+        }
+    },
+
     setup(nodeType, nodeData) {
         const onConfigure = nodeType.prototype.onConfigure;
         nodeType.prototype.onConfigure = function () {
@@ -244,7 +256,7 @@ const LocalLoraGalleryNode = {
                             <div class="locallora-controls-row">
                                 <button class="tag-filter-mode-btn" title="Click to switch filter mode">OR</button>
                                 <div class="tag-filter-input-wrapper">
-                                    <input type="text" class="tag-filter-input" placeholder="Filter by Tag...">
+                                    <input type="text" class="tag-filter-input" placeholder="Filter by Tag... (-tag to exclude)">
                                     <button class="clear-tag-filter-btn" title="Clear Tag Filter">✖</button>
                                 </div>
                                 <div class="locallora-multiselect-tag">
@@ -257,6 +269,18 @@ const LocalLoraGalleryNode = {
                                 <select class="folder-filter-select" style="max-width: 150px;">
                                     <option value="">All Folders</option>
                                 </select>
+                                <select class="base-model-filter-select" title="Hide LoRAs built for a different base model" style="max-width: 120px;">
+                                    <option value="">All Models</option>
+                                    <option value="SD1.5">SD1.5</option>
+                                    <option value="SD2">SD2</option>
+                                    <option value="SDXL">SDXL</option>
+                                    <option value="SD3">SD3</option>
+                                    <option value="Flux">Flux</option>
+                                    <option value="Qwen-Image">Qwen-Image</option>
+                                    <option value="Z-Image">Z-Image</option>
+                                    <option value="HunyuanVideo">HunyuanVideo</option>
+                                </select>
+                                <button class="batch-sync-btn" title="Sync every unsynced LoRA in the selected folder with Civitai" style="flex-shrink: 0;">☁️ Sync</button>
                                 <button class="toggle-gallery-btn" title="Toggle Gallery" style="margin-left: auto; flex-shrink: 0;">Hide Gallery</button>
                             </div>
                         </div>
@@ -285,15 +309,18 @@ const LocalLoraGalleryNode = {
             const selectedCountEl = widgetContainer.querySelector(".selected-count");
             const clearTagFilterBtn = widgetContainer.querySelector(".clear-tag-filter-btn");
             const folderFilterSelect = widgetContainer.querySelector(".folder-filter-select");
+            const baseModelFilterSelect = widgetContainer.querySelector(".base-model-filter-select");
             const savePresetBtn = widgetContainer.querySelector(".save-preset-btn");
             const loadPresetBtn = widgetContainer.querySelector(".load-preset-btn");
             const presetDropdown = widgetContainer.querySelector(".preset-dropdown");
+            const batchSyncBtn = widgetContainer.querySelector(".batch-sync-btn");
 
             const saveStateAndFetch = () => {
                 const stateToSave = {
                     filter_tag: tagFilterInput.value,
                     filter_mode: tagFilterModeBtn.textContent,
-                    filter_folder: folderFilterSelect.value
+                    filter_folder: folderFilterSelect.value,
+                    filter_base_model: baseModelFilterSelect.value
                 };
                 LocalLoraGalleryNode.setUiState(this.id, this.properties.lora_gallery_unique_id, stateToSave);
                 fetchAndRender(false);
@@ -312,6 +339,15 @@ const LocalLoraGalleryNode = {
                 }
             });
 
+            let prefetchTimer = null;
+            const schedulePrefetch = () => {
+                clearTimeout(prefetchTimer);
+                prefetchTimer = setTimeout(() => {
+                    const loraNames = this.loraData.filter(item => item.on).map(item => item.lora);
+                    LocalLoraGalleryNode.prefetchLoras(this.id, this.properties.lora_gallery_unique_id, loraNames);
+                }, 750);
+            };
+
             const updateSelection = () => {
                 const serializableData = this.loraData.map(({ element, ...rest }) => rest);
                 const selectionJson = JSON.stringify(serializableData);
@@ -324,6 +360,7 @@ const LocalLoraGalleryNode = {
                     is_collapsed: mainContainer.classList.contains("gallery-collapsed"),
                     lora_stack: serializableData 
                 });
+                schedulePrefetch();
             };
             
             let draggedIndex = -1;
@@ -456,53 +493,7 @@ const LocalLoraGalleryNode = {
                     const result = await response.json();
             
                     if (result.status === 'ok' && result.metadata) {
-                        const { preview_url, preview_type, trigger_words, download_url, tags } = result.metadata;
-                        
-                        const loraInDataSource = this.availableLoras.find(l => l.name === loraName);
-                        if (loraInDataSource) {
-                            loraInDataSource.preview_url = preview_url || '';
-                            loraInDataSource.preview_type = preview_type || 'none';
-                            loraInDataSource.trigger_words = trigger_words || '';
-                            loraInDataSource.download_url = download_url || '';
-                            loraInDataSource.tags = tags || [];
-                        }
-                        
-                        const mediaContainer = card.querySelector('.locallora-media-container');
-                        if (preview_type === 'video' && preview_url) {
-                            mediaContainer.innerHTML = `<video muted loop playsinline src="${preview_url}"></video>`;
-                            const video = mediaContainer.querySelector('video');
-                            card.addEventListener('mouseenter', () => video.play().catch(e => {}));
-                            card.addEventListener('mouseleave', () => { video.pause(); video.currentTime = 0; });
-                        } else if (preview_type === 'image' && preview_url) {
-                            mediaContainer.innerHTML = `<img src="${preview_url}">`;
-                        } else {
-                            const empty_lora_image = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
-                            mediaContainer.innerHTML = `<img src="${empty_lora_image}">`;
-                        }
-
-                        const triggerEl = card.querySelector('.lora-card-triggers');
-                        if(triggerEl) {
-                           triggerEl.textContent = trigger_words || 'No triggers';
-                           triggerEl.title = trigger_words || '';
-                        }
-                        card.dataset.triggerWords = trigger_words || '';
-                        card.dataset.downloadUrl = download_url || '';
-                        card.dataset.tags = (tags || []).join(',');
-                        
-                        const oldLinkBtn = card.querySelector('.lora-card-link-btn');
-                        if(oldLinkBtn) oldLinkBtn.remove();
-                        if(download_url){
-                            const linkBtn = document.createElement('a');
-                            linkBtn.href = download_url;
-                            linkBtn.target = '_blank';
-                            linkBtn.className = 'card-btn lora-card-link-btn';
-                            linkBtn.title = 'Open download page';
-                            linkBtn.innerHTML = '🔗';
-                            linkBtn.addEventListener('click', e => e.stopPropagation());
-                            card.prepend(linkBtn);
-                        }
-                        
-                        renderCardTags(card);
+                        applySyncedMetadata(loraName, card, result.metadata);
                         await loadAllTags();
                     } else {
                        throw new Error(result.message || 'Sync failed');
@@ -518,10 +509,97 @@ const LocalLoraGalleryNode = {
                 }
             };
 
-            const renderGallery = (append = false) => {
+            const applySyncedMetadata = (loraName, card, metadata) => {
+                const { preview_url, preview_type, trigger_words, download_url, tags } = metadata;
+                
+                const loraInDataSource = this.availableLoras.find(l => l.name === loraName);
+                if (loraInDataSource) {
+                    loraInDataSource.preview_url = preview_url || '';
+                    loraInDataSource.preview_type = preview_type || 'none';
+                    loraInDataSource.trigger_words = trigger_words || '';
+                    loraInDataSource.download_url = download_url || '';
+                    loraInDataSource.tags = tags || [];
+                }
+                if (!card) return;
+                
+                const mediaContainer = card.querySelector('.locallora-media-container');
+                if (preview_type === 'video' && preview_url) {
+                    mediaContainer.innerHTML = `<video muted loop playsinline src="${preview_url}"></video>`;
+                } else if (preview_type === 'image' && preview_url) {
+                    mediaContainer.innerHTML = `<img src="${preview_url}">`;
+                } else {
+                    const empty_lora_image = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
+                    mediaContainer.innerHTML = `<img src="${empty_lora_image}">`;
+                }
+
+                const triggerEl = card.querySelector('.lora-card-triggers');
+                if(triggerEl) {
+                   triggerEl.textContent = trigger_words || 'No triggers';
+                   triggerEl.title = trigger_words || '';
+                }
+                card.dataset.triggerWords = trigger_words || '';
+                card.dataset.downloadUrl = download_url || '';
+                card.dataset.tags = (tags || []).join(',');
+                
+                const oldLinkBtn = card.querySelector('.lora-card-link-btn');
+                if(oldLinkBtn) oldLinkBtn.remove();
+                if(download_url){
+                    const linkBtn = document.createElement('a');
+                    linkBtn.href = download_url;
+                    linkBtn.target = '_blank';
+                    linkBtn.className = 'card-btn lora-card-link-btn';
+                    linkBtn.title = 'Open download page';
+                    linkBtn.innerHTML = '🔗';
+                    linkBtn.addEventListener('click', e => e.stopPropagation());
+                    card.prepend(linkBtn);
+                }
+                
+                renderCardTags(card);
+            };
+
+            const findCard = (loraName) => Array.from(galleryEl.querySelectorAll('.locallora-lora-card')).find(c => c.dataset.loraName === loraName);
+
+            let batchSyncJobId = null;
+            const startBatchSync = async () => {
+                if (batchSyncJobId) return;
+                const folder = folderFilterSelect.value;
+                const scope = folder ? `folder "${folder}"` : "the whole library";
+                if (!confirm(`Sync all unsynced LoRAs in ${scope} with Civitai?`)) return;
+                try {
+                    const body = folder ? { folder, skip_synced: true } : { all: true, skip_synced: true };
+                    const res = await api.fetchApi("/localloragallery/sync_civitai_batch", {
+                        method: "POST", headers: { "Content-Type": "application/json" },
+                        body: JSON.stringify(body),
+                    });
+                    const data = await res.json();
+                    if (data.status !== 'ok') throw new Error(data.message || 'Batch sync failed');
+                    batchSyncJobId = data.job.job_id;
+                    batchSyncBtn.textContent = `☁️ 0/${data.job.total}`;
+                } catch (e) {
+                    console.error("LocalLoraGallery: Failed to start batch sync:", e);
+                }
+            };
+
+            const onJobProgress = async ({ detail }) => {
+                if (!detail || detail.job_id !== batchSyncJobId) return;
+                if (detail.item && detail.item.status === 'ok' && detail.item.metadata) {
+                    applySyncedMetadata(detail.item.lora_name, findCard(detail.item.lora_name), detail.item.metadata);
+                }
+                if (detail.status === 'running') {
+                    batchSyncBtn.textContent = `☁️ ${detail.done}/${detail.total}`;
+                } else {
+                    batchSyncJobId = null;
+                    batchSyncBtn.textContent = "☁️ Sync";
+                    batchSyncBtn.title = `Last batch sync: ${detail.done - detail.failed} synced, ${detail.failed} failed`;
+                    await loadAllTags();
+                }
+            };
+            api.addEventListener("localloragallery.job_progress", onJobProgress);
+
+            const renderGallery = (append = false, localFilter = false) => {
                 if (!append) galleryEl.innerHTML = "";
                 const nameFilter = searchInput.value.toLowerCase();
-                const lorasToRender = this.availableLoras.filter(lora => lora.name.toLowerCase().includes(nameFilter));
+                const lorasToRender = localFilter ? this.availableLoras.filter(lora => lora.name.toLowerCase().includes(nameFilter)) : this.availableLoras;
                 const existingCardNames = new Set(Array.from(galleryEl.querySelectorAll('.locallora-lora-card')).map(c => c.dataset.loraName));
 
                 lorasToRender.forEach(lora => {
@@ -533,7 +611,7 @@ const LocalLoraGalleryNode = {
                     card.dataset.tags = lora.tags.join(',');
                     card.dataset.triggerWords = lora.trigger_words;
                     card.dataset.downloadUrl = lora.download_url;
-                    card.title = lora.name;
+                    card.title = lora.base_model && lora.base_model !== "unknown" ? `${lora.name} (${lora.base_model})` : lora.name;
 
                     let mediaHTML = '';
                     const empty_lora_image = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
@@ -575,13 +653,12 @@ const LocalLoraGalleryNode = {
 
                     renderCardTags(card);
                     
-                    if (lora.preview_type === 'video') {
-                        const video = card.querySelector('video');
-                        if (video) {
-                            card.addEventListener('mouseenter', () => video.play().catch(e => {}));
-                            card.addEventListener('mouseleave', () => { video.pause(); video.currentTime = 0; });
-                        }
-                    }
+                    // Attached once per card and resolved on hover, since a sync can swap the preview in or out later.
+                    card.addEventListener('mouseenter', () => card.querySelector('.locallora-media-container video')?.play().catch(e => {}));
+                    card.addEventListener('mouseleave', () => {
+                        const video = card.querySelector('.locallora-media-container video');
+                        if (video) { video.pause(); video.currentTime = 0; }
+                    });
 
                     card.addEventListener("click", () => {
                         const loraName = card.dataset.loraName;
@@ -645,14 +722,15 @@ const LocalLoraGalleryNode = {
 
                 const currentSearchTerm = searchInput ? searchInput.value.trim() : "";
 
-                const { loras, folders } = await LocalLoraGalleryNode.getLoras.call(
+                const { loras, folders, tag_facets } = await LocalLoraGalleryNode.getLoras.call(
                     this, 
                     tagFilterInput.value, 
                     tagFilterModeBtn.textContent, 
                     folderFilterSelect.value, 
                     pageToFetch, 
                     this.loraData.map(item => item.lora),
-                    currentSearchTerm
+                    currentSearchTerm,
+                    baseModelFilterSelect.value
                 );
 
                 if (append) {
@@ -661,33 +739,80 @@ const LocalLoraGalleryNode = {
                 } else {
                     this.availableLoras = loras || [];
                     if (!foldersRendered && folders && folders.length > 0) renderFolders(folders);
+                    renderTagOptions(tag_facets);
                     galleryEl.scrollTop = 0;
                 }
                 renderGallery(append);
             };
 
+            let nodeRemoved = false;
+            const refreshAfterCatalogChange = debounce(() => { if (!nodeRemoved) fetchAndRender(false); }, 500);
+            const refreshTagsAfterCatalogChange = debounce(() => { if (!nodeRemoved) loadAllTags(); }, 500);
+            const onCatalogChanged = ({ detail }) => {
+                if (!detail || nodeRemoved) return;
+                if (detail.reset || (detail.added && detail.added.length > 0)) {
+                    refreshAfterCatalogChange();
+                    return;
+                }
+                const removed = new Set(detail.removed || []);
+                if (removed.size > 0) {
+                    this.availableLoras = this.availableLoras.filter(l => !removed.has(l.name));
+                    removed.forEach(name => { const card = findCard(name); if (card) card.remove(); });
+                }
+                (detail.updated || []).forEach(item => {
+                    if (!this.availableLoras.some(l => l.name === item.name)) return;
+                    applySyncedMetadata(item.name, findCard(item.name), item);
+                });
+                if (removed.size > 0 || (detail.updated || []).length > 0) refreshTagsAfterCatalogChange();
+            };
+            api.addEventListener("localloragallery.catalog_changed", onCatalogChanged);
+
+            const onRemoved = this.onRemoved;
+            this.onRemoved = function () {
+                nodeRemoved = true;
+                api.removeEventListener("localloragallery.job_progress", onJobProgress);
+                api.removeEventListener("localloragallery.catalog_changed", onCatalogChanged);
+                return onRemoved?.apply(this, arguments);
+            };
+
             const handleTagSelectionChange = () => {
                 const selectedTags = Array.from(multiSelectTagDropdown.querySelectorAll('input:checked')).map(cb => cb.value);
-                tagFilterInput.value = selectedTags.join(',');
+                const excludedTags = tagFilterInput.value.split(',').map(t => t.trim()).filter(t => t.startsWith('-') || t.startsWith('!'));
+                tagFilterInput.value = [...selectedTags, ...excludedTags].join(',');
                 saveStateAndFetch();
             };
 
+            const renderTagOptions = (facets) => {
+                const selectedTags = new Set(tagFilterInput.value.split(',').map(t => t.trim().toLowerCase()).filter(t => t && !t.startsWith('-') && !t.startsWith('!')));
+                const shownTags = new Set();
+                multiSelectTagDropdown.innerHTML = '';
+                const addOption = (tag, count) => {
+                    shownTags.add(tag.toLowerCase());
+                    const label = document.createElement('label');
+                    const checkbox = document.createElement('input');
+                    checkbox.type = 'checkbox';
+                    checkbox.value = tag;
+                    checkbox.checked = selectedTags.has(tag.toLowerCase());
+                    checkbox.addEventListener('change', handleTagSelectionChange);
+                    label.append(checkbox, ` ${tag} (${count})`);
+                    multiSelectTagDropdown.appendChild(label);
+                };
+                (facets || []).forEach(([tag, count]) => addOption(tag, count));
+                selectedTags.forEach(tag => { if (!shownTags.has(tag)) addOption(tag, 0); });
+            };
+
             const loadAllTags = async () => {
                 try {
-                    const response = await api.fetchApi("/localloragallery/get_all_tags");
+                    const params = new URLSearchParams({
+                        filter_tag: tagFilterInput.value,
+                        mode: tagFilterModeBtn.textContent,
+                        folder: folderFilterSelect.value,
+                        name_filter: searchInput.value.trim(),
+                        base_model: baseModelFilterSelect.value,
+                    });
+                    const response = await api.fetchApi(`/localloragallery/get_all_tags?${params}`);
                     const data = await response.json();
-                    multiSelectTagDropdown.innerHTML = '';
-                    if (data.tags) {
-                        data.tags.forEach(tag => {
-                            const label = document.createElement('label');
-                            const checkbox = document.createElement('input');
-                            checkbox.type = 'checkbox';
-                            checkbox.value = tag;
-                            checkbox.addEventListener('change', handleTagSelectionChange);
-                            label.append(checkbox, ` ${tag}`);
-                            multiSelectTagDropdown.appendChild(label);
-                        });
-                    }
+                    renderTagOptions(data.tag_facets);
                 } catch(e) { console.error("LocalLoraGallery: Failed to load all tags:", e); }
             };
 
@@ -856,7 +981,8 @@ const LocalLoraGalleryNode = {
                     lora_stack: [],
                     filter_tag: "",
                     filter_mode: "OR",
-                    filter_folder: ""
+                    filter_folder: "",
+                    filter_base_model: ""
                 };
                 try {
                     const res = await api.fetchApi(`/localloragallery/get_ui_state?node_id=${this.id}&gallery_id=${this.properties.lora_gallery_unique_id}`);
@@ -885,6 +1011,7 @@ const LocalLoraGalleryNode = {
                 this.setProperty("selection_data", selectionJson);
                 const widget = this.widgets.find(w => w.name === "selection_data");
                 if (widget) widget.value = selectionJson;
+                schedulePrefetch();
 
                 tagFilterInput.value = initialState.filter_tag;
                 if (initialState.filter_mode === "AND") {
@@ -895,7 +1022,10 @@ const LocalLoraGalleryNode = {
                     tagFilterModeBtn.style.backgroundColor = "#555";
                 }
                 
-                await loadAllTags();
+                if (initialState.filter_base_model && baseModelFilterSelect.querySelector(`option[value="${initialState.filter_base_model}"]`)) {
+                    baseModelFilterSelect.value = initialState.filter_base_model;
+                }
+
                 await loadPresets();
                 await fetchAndRender(); 
 
@@ -1058,6 +1188,9 @@ const LocalLoraGalleryNode = {
                 });
                 
                 folderFilterSelect.addEventListener("change", saveStateAndFetch);
+                baseModelFilterSelect.addEventListener("change", saveStateAndFetch);
+
+                batchSyncBtn.addEventListener("click", startBatchSync);
 
                 tagFilterModeBtn.addEventListener("click", () => {
                     if (tagFilterModeBtn.textContent === "OR") {
@@ -1123,7 +1256,7 @@ const LocalLoraGalleryNode = {
                 }, 300);
 
                 searchInput.addEventListener("input", () => {
-                    renderGallery(false);
+                    renderGallery(false, true);
                     debouncedServerSearch();
                 });
 